@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User, UserEmbedding
+from .models import User, UserEmbedding, Skill, Interest, EventTag
 
 
 @admin.register(User)
@@ -7,10 +7,18 @@ class UserAdmin(admin.ModelAdmin):
     list_display = ['username', 'email', 'first_name', 'last_name', 'created_at']
     list_filter = ['created_at', 'is_active']
     search_fields = ['username', 'email', 'first_name', 'last_name']
-    readonly_fields = ['created_at', 'updated_at']
+    # Derived from skills/interests/event_tags on save
+    readonly_fields = [
+        'created_at', 'updated_at', 'canonical_skills', 'canonical_interests', 'canonical_event_tags'
+    ]
 
 
 @admin.register(UserEmbedding)
 class UserEmbeddingAdmin(admin.ModelAdmin):
     list_display = ['user', 'last_updated']
-    readonly_fields = ['last_updated']
\ No newline at end of file
+    readonly_fields = ['last_updated']
+
+@admin.register(Skill, Interest, EventTag)
+class CanonicalTermAdmin(admin.ModelAdmin):
+    list_display = ['name', 'key']
+    search_fields = ['name', 'key']
@@ -3,4 +3,19 @@ from django.apps import AppConfig
 
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'accounts'
\ No newline at end of file
+    name = 'accounts'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from quicksync.metrics import registry
+        from .resolver import uid_cache
+
+        @registry.collector
+        def uid_cache_metrics():
+            stats = uid_cache.stats()
+            return [
+                ('cache_hits_total', 'counter', 'Cache hits by cache and tier',
+                 {'cache': 'firebase_uid', 'tier': 'memory'}, stats['hits']),
+                ('cache_hits_total', 'counter', '', {'cache': 'firebase_uid', 'tier': 'shared'}, stats['shared_hits']),
+                ('cache_misses_total', 'counter', 'Cache misses by cache', {'cache': 'firebase_uid'}, stats['misses']),
+            ]
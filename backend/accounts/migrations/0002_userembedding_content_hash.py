@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userembedding',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
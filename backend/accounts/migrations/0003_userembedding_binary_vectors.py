@@ -0,0 +1,56 @@
+import numpy as np
+from django.db import migrations, models
+
+FIELDS = ['skills_embedding', 'interests_embedding', 'combined_embedding']
+
+
+def json_to_binary(apps, schema_editor):
+    UserEmbedding = apps.get_model('accounts', 'UserEmbedding')
+    batch = []
+    for user_embedding in UserEmbedding.objects.iterator(chunk_size=500):
+        for field in FIELDS:
+            values = getattr(user_embedding, f'{field}_json') or []
+            setattr(user_embedding, field, np.asarray(values, dtype=np.float32).tobytes())
+        batch.append(user_embedding)
+        if len(batch) >= 500:
+            UserEmbedding.objects.bulk_update(batch, FIELDS)
+            batch = []
+    UserEmbedding.objects.bulk_update(batch, FIELDS)
+
+
+def binary_to_json(apps, schema_editor):
+    UserEmbedding = apps.get_model('accounts', 'UserEmbedding')
+    json_fields = [f'{field}_json' for field in FIELDS]
+    batch = []
+    for user_embedding in UserEmbedding.objects.iterator(chunk_size=500):
+        for field in FIELDS:
+            data = getattr(user_embedding, field) or b''
+            setattr(user_embedding, f'{field}_json', np.frombuffer(data, dtype=np.float32).tolist())
+        batch.append(user_embedding)
+        if len(batch) >= 500:
+            UserEmbedding.objects.bulk_update(batch, json_fields)
+            batch = []
+    UserEmbedding.objects.bulk_update(batch, json_fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_userembedding_content_hash'),
+    ]
+
+    operations = [
+        *[
+            migrations.RenameField(model_name='userembedding', old_name=field, new_name=f'{field}_json')
+            for field in FIELDS
+        ],
+        *[
+            migrations.AddField(model_name='userembedding', name=field, field=models.BinaryField(default=bytes))
+            for field in FIELDS
+        ],
+        migrations.RunPython(json_to_binary, binary_to_json),
+        *[
+            migrations.RemoveField(model_name='userembedding', name=f'{field}_json')
+            for field in FIELDS
+        ],
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations, models
+from accounts.models import backfill_terms
+
+
+def backfill_user_terms(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    backfill_terms(User, 'canonical_skills', 'skills')
+    backfill_terms(User, 'canonical_interests', 'interests')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_userembedding_binary_vectors'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Interest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('key', models.CharField(max_length=255, unique=True)),
+            ],
+            options={
+                'ordering': ['key'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('key', models.CharField(max_length=255, unique=True)),
+            ],
+            options={
+                'ordering': ['key'],
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='canonical_interests',
+            field=models.ManyToManyField(blank=True, related_name='users', to='accounts.interest'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='canonical_skills',
+            field=models.ManyToManyField(blank=True, related_name='users', to='accounts.skill'),
+        ),
+        migrations.RunPython(backfill_user_terms, migrations.RunPython.noop),
+    ]
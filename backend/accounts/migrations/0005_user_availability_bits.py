@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:23
+
+from django.db import migrations, models
+from matchmaking.availability import compile_availability
+
+
+def compile_existing(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    batch = []
+    for user in User.objects.only('id', 'availability').iterator(chunk_size=500):
+        user.availability_bits = compile_availability(user.availability)
+        batch.append(user)
+        if len(batch) >= 500:
+            User.objects.bulk_update(batch, ['availability_bits'])
+            batch = []
+    User.objects.bulk_update(batch, ['availability_bits'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_canonical_terms'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='availability_bits',
+            field=models.BinaryField(default=bytes),
+        ),
+        migrations.RunPython(compile_existing, migrations.RunPython.noop),
+    ]
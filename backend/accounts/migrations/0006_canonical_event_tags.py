@@ -0,0 +1,35 @@
+from django.db import migrations, models
+from accounts.models import backfill_terms
+
+
+def backfill_user_event_tags(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    backfill_terms(User, 'canonical_event_tags', 'event_tags')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_user_availability_bits'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('key', models.CharField(max_length=255, unique=True)),
+            ],
+            options={
+                'ordering': ['key'],
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='canonical_event_tags',
+            field=models.ManyToManyField(blank=True, related_name='users', to='accounts.eventtag'),
+        ),
+        migrations.RunPython(backfill_user_event_tags, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,115 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+import copy
 import json
+import numpy as np
+from matchmaking.availability import compile_availability
+from matchmaking.text import normalize_term
+
+# Storage type of embedding vectors
+EMBEDDING_DTYPE = np.float32
+
+TERM_MAX_LENGTH = 255
+
+
+def term_key(name):
+    """Canonical lookup key of a free-form skill, interest or event tag"""
+    return normalize_term(name)[:TERM_MAX_LENGTH]
+
+
+def term_name(name):
+    """Display form of a free-form skill, interest or event tag"""
+    return ' '.join(str(name).split())[:TERM_MAX_LENGTH]
+
+
+class CanonicalTerm(models.Model):
+    """A skill, interest or event tag shared by every profile that lists it
+
+    `name` keeps the spelling it was first seen with; `key` is the case-folded
+    form used for lookups and uniqueness.
+    """
+    name = models.CharField(max_length=TERM_MAX_LENGTH)
+    key = models.CharField(max_length=TERM_MAX_LENGTH, unique=True)
+    
+    class Meta:
+        abstract = True
+        ordering = ['key']
+    
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def resolve(cls, names):
+        """Rows for the given free-form names, creating any that are missing"""
+        names_by_key = {}
+        for name in names or []:
+            key = term_key(name)
+            if key:
+                names_by_key.setdefault(key, term_name(name))
+        if not names_by_key:
+            return []
+        terms = list(cls.objects.filter(key__in=names_by_key))
+        missing = names_by_key.keys() - {term.key for term in terms}
+        if missing:
+            cls.objects.bulk_create(
+                [cls(key=key, name=names_by_key[key]) for key in missing],
+                ignore_conflicts=True
+            )
+            terms += cls.objects.filter(key__in=missing)
+        return terms
+
+
+class Skill(CanonicalTerm):
+    pass
+
+
+class Interest(CanonicalTerm):
+    pass
+
+
+class EventTag(CanonicalTerm):
+    pass
+
+
+def sync_terms(relation, names):
+    """Point a canonical term M2M (e.g. user.canonical_skills) at `names`"""
+    relation.set(relation.model.resolve(names))
+
+
+def backfill_terms(model, field_name, source_field):
+    """Link every row of `model` to the canonical terms of its JSON list field
+
+    Works in bulk on (possibly historical) models, so data migrations and
+    repairs after bulk writes can use it.
+    """
+    field = model._meta.get_field(field_name)
+    term_model = field.related_model
+    through = field.remote_field.through
+    rows = list(model.objects.values_list('pk', source_field))
+
+    names_by_key = {}
+    for _, names in rows:
+        for name in names or []:
+            key = term_key(name)
+            if key:
+                names_by_key.setdefault(key, term_name(name))
+    term_model.objects.bulk_create(
+        [term_model(key=key, name=name) for key, name in names_by_key.items()],
+        batch_size=500,
+        ignore_conflicts=True
+    )
+    term_ids = dict(term_model.objects.values_list('key', 'id'))
+
+    links = {
+        (pk, term_ids[term_key(name)])
+        for pk, names in rows for name in names or [] if term_key(name)
+    }
+    source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+    through.objects.bulk_create(
+        [through(**{f'{source}_id': pk, f'{target}_id': term_id}) for pk, term_id in links],
+        batch_size=500,
+        ignore_conflicts=True
+    )
 
 
 class User(AbstractUser):
@@ -9,22 +118,98 @@ class User(AbstractUser):
     skills = models.JSONField(default=list)  # List of skills
     interests = models.JSONField(default=list)  # List of interests  
     availability = models.JSONField(default=dict)  # Weekly schedule as JSON
+    availability_bits = models.BinaryField(default=bytes)  # `availability` packed by compile_availability
     event_tags = models.JSONField(default=list)  # Event preferences
     firebase_uid = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    # Canonical rows mirroring `skills`/`interests`, kept in sync on save
+    canonical_skills = models.ManyToManyField(Skill, blank=True, related_name='users')
+    canonical_interests = models.ManyToManyField(Interest, blank=True, related_name='users')
+    canonical_event_tags = models.ManyToManyField(EventTag, blank=True, related_name='users')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Fields whose loaded values are remembered so saves can tell what changed
+    TRACKED_FIELDS = ('skills', 'interests', 'availability', 'event_tags', 'is_active', 'firebase_uid')
+    
     def __str__(self):
         return self.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_tracked_fields()
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'availability' in update_fields:
+            if self.has_changed('availability') or not self.availability_bits:
+                self.availability_bits = compile_availability(self.availability)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'availability_bits'}
+        super().save(*args, **kwargs)
+        self._remember_tracked_fields()
+
+    def _remember_tracked_fields(self):
+        # Deep copies, so in-place edits of the JSON lists still count as changes
+        self._loaded_values = {
+            field: copy.deepcopy(self.__dict__[field])
+            for field in self.TRACKED_FIELDS if field in self.__dict__
+        }
+
+    def has_changed(self, *fields):
+        """Whether any of the tracked `fields` differ from the last load/save
+
+        Meant for post_save handlers, which run before the snapshot is
+        refreshed. Unsaved users and deferred fields count as changed.
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return True
+        return any(
+            field not in loaded or loaded[field] != self.__dict__.get(field)
+            for field in fields
+        )
+
 
 class UserEmbedding(models.Model):
-    """Store precomputed embeddings for users for efficient matching"""
+    """Store precomputed embeddings for users for efficient matching
+
+    Vectors are stored as raw float32 bytes; use the *_vector properties to
+    read them as NumPy arrays and set_vectors() to write them.
+    """
     user = models.OneToOneField(User, on_delete=models.CASCADE)
-    skills_embedding = models.JSONField(default=list)  # Embedding for skills
-    interests_embedding = models.JSONField(default=list)  # Embedding for interests
-    combined_embedding = models.JSONField(default=list)  # Combined embedding
+    skills_embedding = models.BinaryField(default=bytes)  # Embedding for skills
+    interests_embedding = models.BinaryField(default=bytes)  # Embedding for interests
+    combined_embedding = models.BinaryField(default=bytes)  # Combined embedding
+    content_hash = models.CharField(max_length=64, blank=True)  # Hash of the embedded texts
     last_updated = models.DateTimeField(auto_now=True)
     
     def __str__(self):
-        return f"Embedding for {self.user.username}"
\ No newline at end of file
+        return f"Embedding for {self.user.username}"
+
+    @staticmethod
+    def pack(vector):
+        return np.asarray(vector, dtype=EMBEDDING_DTYPE).tobytes()
+
+    @staticmethod
+    def unpack(data):
+        """Read-only array view over stored bytes (no copy)"""
+        return np.frombuffer(data, dtype=EMBEDDING_DTYPE)
+
+    @property
+    def skills_vector(self):
+        return self.unpack(self.skills_embedding)
+
+    @property
+    def interests_vector(self):
+        return self.unpack(self.interests_embedding)
+
+    @property
+    def combined_vector(self):
+        return self.unpack(self.combined_embedding)
+
+    def set_vectors(self, skills, interests, combined):
+        self.skills_embedding = self.pack(skills)
+        self.interests_embedding = self.pack(interests)
+        self.combined_embedding = self.pack(combined)
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""
+Resolve the Firebase UID sent with a request to its user, once per request
+"""
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+
+SHARED_KEY_PREFIX = 'accounts:uid:'
+
+
+class FirebaseUIDCache:
+    """Bounded firebase_uid -> user id LRU with a TTL
+
+    Only ids are cached, never user rows, so a hit still loads the current
+    row by primary key: views save the user they resolve, and a row cached
+    in one process would be stale after an edit made in another. With `shared` set, misses fall back to Django's
+    cache before the database, so processes warm each other. Unknown UIDs
+    are not cached: a user created in another process must resolve at once.
+    """
+
+    def __init__(self, maxsize, ttl, shared=False):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared = shared
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def get(self, uid):
+        with self._lock:
+            entry = self._entries.get(uid)
+            if entry is not None:
+                user_id, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(uid)
+                    self.hits += 1
+                    return user_id
+                del self._entries[uid]
+        if self.shared:
+            user_id = cache.get(SHARED_KEY_PREFIX + uid)
+            if user_id is not None:
+                self._remember(uid, user_id)
+                self.shared_hits += 1
+                return user_id
+        self.misses += 1
+        return None
+
+    def set(self, uid, user_id):
+        self._remember(uid, user_id)
+        if self.shared:
+            cache.set(SHARED_KEY_PREFIX + uid, user_id, timeout=self.ttl)
+
+    def _remember(self, uid, user_id):
+        with self._lock:
+            self._entries[uid] = (user_id, time.monotonic() + self.ttl)
+            self._entries.move_to_end(uid)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *uids):
+        uids = [uid for uid in uids if uid]
+        with self._lock:
+            for uid in uids:
+                self._entries.pop(uid, None)
+        if self.shared and uids:
+            cache.delete_many([SHARED_KEY_PREFIX + uid for uid in uids])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'shared': self.shared,
+            'hits': self.hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.shared_hits) / lookups if lookups else None,
+        }
+
+
+uid_cache = FirebaseUIDCache(
+    settings.FIREBASE_UID_CACHE_SIZE,
+    settings.FIREBASE_UID_CACHE_TTL,
+    shared=settings.FIREBASE_UID_CACHE_SHARED
+)
+
+
+def resolve_firebase_uid(uid):
+    """The user with this Firebase UID, or None"""
+    from .models import User
+
+    if not uid:
+        return None
+    user_id = uid_cache.get(uid)
+    if user_id is not None:
+        user = User.objects.filter(pk=user_id).first()
+        if user is not None and user.firebase_uid == uid:
+            return user
+        uid_cache.invalidate(uid)
+    user = User.objects.filter(firebase_uid=uid).first()
+    if user is not None:
+        uid_cache.set(uid, user.pk)
+    return user
+
+
+def request_firebase_uid(request, param='firebase_uid'):
+    """The UID sent in the request body or, failing that, the query string"""
+    data = getattr(request, 'data', None)
+    uid = data.get(param) if hasattr(data, 'get') else None
+    return uid or request.query_params.get(param)
+
+
+def firebase_user(request, param='firebase_uid'):
+    """The user named by the request's firebase_uid, resolved once per request
+
+    The result (None included) is kept on the underlying HttpRequest, so
+    views, serializers and helpers handling the same request share it.
+    """
+    http_request = getattr(request, '_request', request)
+    resolved = http_request.__dict__.setdefault('_firebase_users', {})
+    if param not in resolved:
+        resolved[param] = resolve_firebase_uid(request_firebase_uid(request, param))
+    return resolved[param]
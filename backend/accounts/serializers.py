@@ -11,6 +11,16 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
+class UserListSerializer(UserSerializer):
+    """UserSerializer limited to the field names in context['fields']"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get('fields')
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
 class UserProfileSerializer(serializers.ModelSerializer):
     """Serializer for user profile updates"""
     class Meta:
@@ -0,0 +1,33 @@
+"""
+Mirror free-form profile lists into the canonical Skill/Interest/EventTag
+tables, and drop cached firebase_uid lookups of changed users
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import User, sync_terms
+from .resolver import uid_cache
+
+
+@receiver(post_save, sender=User)
+def sync_user_terms(sender, instance, created, **kwargs):
+    if created or instance.has_changed('skills'):
+        sync_terms(instance.canonical_skills, instance.skills)
+    if created or instance.has_changed('interests'):
+        sync_terms(instance.canonical_interests, instance.interests)
+    if created or instance.has_changed('event_tags'):
+        sync_terms(instance.canonical_event_tags, instance.event_tags)
+
+
+@receiver(post_save, sender=User)
+def forget_saved_uid(sender, instance, **kwargs):
+    # Both the UID the user was loaded with and the one just saved
+    loaded_uid = getattr(instance, '_loaded_values', {}).get('firebase_uid')
+    uids = (loaded_uid, instance.firebase_uid)
+    transaction.on_commit(lambda: uid_cache.invalidate(*uids))
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_uid(sender, instance, **kwargs):
+    uid = instance.firebase_uid
+    transaction.on_commit(lambda: uid_cache.invalidate(uid))
@@ -0,0 +1,72 @@
+from django.test import RequestFactory, TestCase, override_settings
+from .models import User
+from .resolver import firebase_user, resolve_firebase_uid, uid_cache
+
+
+# Profile edits only queue their embedding, so no model is needed
+@override_settings(MATCHING_EMBEDDING_QUEUE=True)
+class FirebaseUIDResolverTests(TestCase):
+    def setUp(self):
+        uid_cache.clear()
+        self.user = User.objects.create(username='ada', firebase_uid='uid-ada', skills=['Python'])
+
+    def test_hit_loads_current_row_by_primary_key(self):
+        with self.assertNumQueries(1):
+            resolve_firebase_uid('uid-ada')
+        # Edited elsewhere, without this process's save signals
+        User.objects.filter(pk=self.user.pk).update(skills=['Go'])
+        with self.assertNumQueries(1) as queries:
+            user = resolve_firebase_uid('uid-ada')
+        self.assertIn('"id" =', queries.captured_queries[0]['sql'])
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.skills, ['Go'])
+        self.assertFalse(user.has_changed('skills'))
+
+    def test_hits_return_separate_instances(self):
+        resolve_firebase_uid('uid-ada').skills.append('Go')
+        self.assertEqual(resolve_firebase_uid('uid-ada').skills, ['Python'])
+
+    def test_request_resolves_once(self):
+        request = RequestFactory().get('/', {'firebase_uid': 'uid-ada'})
+        request.query_params = request.GET
+        with self.assertNumQueries(1):
+            user = firebase_user(request)
+        with self.assertNumQueries(0):
+            self.assertIs(firebase_user(request), user)
+
+    def test_saved_user_is_reloaded(self):
+        resolve_firebase_uid('uid-ada')
+        self.user.skills = ['Rust']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(resolve_firebase_uid('uid-ada').skills, ['Rust'])
+
+    def test_deleted_user_is_forgotten(self):
+        resolve_firebase_uid('uid-ada')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertIsNone(resolve_firebase_uid('uid-ada'))
+
+    def test_unknown_uid(self):
+        self.assertIsNone(resolve_firebase_uid('uid-unknown'))
+        self.assertIsNone(resolve_firebase_uid(''))
+
+
+class UserListFilterTests(TestCase):
+    def listed_ids(self, **params):
+        response = self.client.get('/api/auth/users/', params)
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_event_tag_filter_runs_in_database(self):
+        tagged = User.objects.create(username='ada', event_tags=['HackMIT', 'TreeHacks'])
+        User.objects.create(username='bob', event_tags=['TreeHacks'])
+        with self.assertNumQueries(1):
+            self.assertEqual(self.listed_ids(event_tag=' hackmit '), [tagged.id])
+
+    def test_event_tags_follow_profile_edits(self):
+        user = User.objects.create(username='ada', event_tags=['HackMIT'])
+        user.event_tags = ['CalHacks']
+        user.save()
+        self.assertEqual(self.listed_ids(event_tag='CalHacks'), [user.id])
+        self.assertEqual(self.listed_ids(event_tag='HackMIT'), [])
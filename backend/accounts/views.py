@@ -1,13 +1,19 @@
+import logging
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
-from .models import User
+from .models import User, term_key
 from django.contrib.auth import get_user_model
-from .serializers import UserSerializer, UserProfileSerializer
+from .resolver import firebase_user, resolve_firebase_uid
+from .serializers import UserSerializer, UserListSerializer, UserProfileSerializer
 import json
 
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
+
 
 class ProfileView(generics.RetrieveUpdateAPIView):
     """Get and update user profile"""
@@ -18,35 +24,68 @@ class ProfileView(generics.RetrieveUpdateAPIView):
         firebase_uid = self.request.data.get('firebase_uid') or self.request.query_params.get('firebase_uid')
         if not firebase_uid:
             raise Exception('Missing firebase_uid in request')
-        user = User.objects.filter(firebase_uid=firebase_uid).first()
+        user = firebase_user(self.request)
         if not user:
             raise Exception('User not found for firebase_uid')
         return user
 
 
+class UserListPagination(CursorPagination):
+    """Keyset pages on the primary key: no COUNT(*) and no deep OFFSET"""
+    ordering = 'id'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
 class UserListView(generics.ListAPIView):
-    """List all users for matching purposes"""
-    serializer_class = UserSerializer
+    """List users for matching purposes
+
+    `?fields=` picks the returned fields (comma separated, default
+    LIST_FIELDS); `?skill=`, `?interest=` and `?event_tag=` filter.
+    """
+    serializer_class = UserListSerializer
     permission_classes = []
-    
+    pagination_class = UserListPagination
+    LIST_FIELDS = ['id', 'username', 'first_name', 'last_name', 'skills', 'interests', 'event_tags']
+
+    def get_fields(self):
+        requested = self.request.query_params.get('fields')
+        if not requested:
+            return self.LIST_FIELDS
+        fields = [name.strip() for name in requested.split(',') if name.strip()]
+        unknown = set(fields) - set(UserSerializer.Meta.fields)
+        if unknown:
+            raise ValidationError({'fields': f"Unknown fields: {', '.join(sorted(unknown))}"})
+        return fields
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'fields': self.get_fields()}
+
     def get_queryset(self):
-        # Exclude current user from results
-        return User.objects.exclude(id=self.request.user.id)
+        params = self.request.query_params
+        # Exclude current user from results; `id` is the pagination key
+        users = User.objects.exclude(id=self.request.user.id).only('id', *self.get_fields())
+        if params.get('skill'):
+            users = users.filter(canonical_skills__key=term_key(params['skill']))
+        if params.get('interest'):
+            users = users.filter(canonical_interests__key=term_key(params['interest']))
+        if params.get('event_tag'):
+            users = users.filter(canonical_event_tags__key=term_key(params['event_tag']))
+        return users
 
 
 @api_view(['POST'])
 def sync_firebase_user(request):
     """Sync Firebase user data with Django user"""
     try:
-        print('sync_firebase_user request.data:', request.data)
         firebase_uid = request.data.get('firebase_uid')
         user_data = request.data.get('user_data', {})
 
         if not firebase_uid:
-            print('Missing firebase_uid in request:', request.data)
             return Response({'error': 'Missing firebase_uid'}, status=status.HTTP_400_BAD_REQUEST)
 
-        user = User.objects.filter(firebase_uid=firebase_uid).first()
+        user = resolve_firebase_uid(firebase_uid)
         if not user:
             # Generate a unique username
             base_username = f"user_{firebase_uid[:8]}"
@@ -56,6 +95,7 @@ def sync_firebase_user(request):
                 username = f"{base_username}_{counter}"
                 counter += 1
             user = User.objects.create(firebase_uid=firebase_uid, username=username)
+            logger.info('Firebase user created', extra={'user_id': user.id})
         # Update other fields for both new and existing users
         if 'email' in user_data:
             user.email = user_data['email']
@@ -70,7 +110,7 @@ def sync_firebase_user(request):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     except Exception as e:
-        print('sync_firebase_user error:', str(e))
+        logger.exception('Firebase user sync failed')
         return Response(
             {'error': str(e)},
             status=status.HTTP_400_BAD_REQUEST
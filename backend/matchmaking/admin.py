@@ -14,4 +14,5 @@ class MatchingSessionAdmin(admin.ModelAdmin):
 class ProjectSuggestionAdmin(admin.ModelAdmin):
     list_display = ['title', 'difficulty_level', 'estimated_duration', 'created_at']
     list_filter = ['difficulty_level', 'created_at']
-    search_fields = ['title', 'description']
\ No newline at end of file
+    search_fields = ['title', 'description']
+    readonly_fields = ['canonical_skills']
\ No newline at end of file
@@ -0,0 +1,219 @@
+"""
+Candidate search backends for the embedding index
+
+A searcher returns the row positions of the best candidates for a query;
+the index then scores those rows exactly. Searchers are told about every
+row change so they can be kept up to date without a full rebuild:
+
+    on_set(matrix, position)          row at `position` was added or replaced
+    on_remove(matrix, position, last) row `position` was removed and the row
+                                      that was at `last` moved into its place
+
+Backends are selected with the MATCHING_ANN_BACKEND setting. 'exact' scores
+every row, 'ivf' is a pure NumPy inverted-file index, and 'faiss' and
+'hnswlib' use those libraries when they are installed.
+"""
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from .scoring import normalize_rows, top_k
+
+
+class ExactSearcher:
+    """Brute-force scoring of every row"""
+    name = 'exact'
+
+    def build(self, matrix):
+        pass
+
+    def on_set(self, matrix, position):
+        pass
+
+    def on_remove(self, matrix, position, last):
+        pass
+
+    def candidates(self, matrix, query, k):
+        return top_k(matrix.score(query), k)
+
+
+class IVFSearcher:
+    """Inverted-file index: rows are clustered with spherical k-means and a
+    query only scores the rows of the `nprobe` closest clusters"""
+    name = 'ivf'
+
+    def __init__(self, nlist=0, nprobe=8, iterations=8, sample_size=10000, seed=0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.iterations = iterations
+        self.sample_size = sample_size
+        self.seed = seed
+        self.centroids = None
+        self.assignments = np.zeros(0, dtype=np.int32)
+
+    def build(self, matrix):
+        rows = matrix.rows[:matrix.size]
+        if not len(rows):
+            self.centroids = None
+            return
+        rng = np.random.default_rng(self.seed)
+        nlist = min(self.nlist or max(1, int(np.sqrt(len(rows)))), len(rows))
+        sample = rows
+        if len(rows) > self.sample_size:
+            sample = rows[rng.choice(len(rows), self.sample_size, replace=False)]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(self.iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            counts = np.bincount(assign, minlength=nlist)
+            # Empty clusters keep their previous centroid
+            filled = counts > 0
+            centroids[filled] = sums[filled]
+            centroids = normalize_rows(centroids)
+        self.centroids = centroids
+        self.assignments = np.zeros(len(matrix.rows), dtype=np.int32)
+        for start in range(0, len(rows), 4096):
+            chunk = rows[start:start + 4096]
+            self.assignments[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+
+    def _ensure_capacity(self, matrix):
+        if len(self.assignments) < len(matrix.rows):
+            assignments = np.zeros(len(matrix.rows), dtype=np.int32)
+            assignments[:len(self.assignments)] = self.assignments
+            self.assignments = assignments
+
+    def on_set(self, matrix, position):
+        if self.centroids is None:
+            return self.build(matrix)
+        self._ensure_capacity(matrix)
+        self.assignments[position] = np.argmax(self.centroids @ matrix.rows[position])
+
+    def on_remove(self, matrix, position, last):
+        if position != last:
+            self.assignments[position] = self.assignments[last]
+
+    def candidates(self, matrix, query, k):
+        if self.centroids is None or not matrix.size:
+            return np.empty(0, dtype=np.intp)
+        probes = top_k(self.centroids @ query, self.nprobe)
+        rows = np.flatnonzero(np.isin(self.assignments[:matrix.size], probes))
+        if len(rows) < k:
+            # Too few rows in the probed clusters; fall back to a full scan
+            return top_k(matrix.score(query), k)
+        return rows[top_k(matrix.rows[rows] @ query, k)]
+
+
+class FaissSearcher:
+    """faiss IndexIVFFlat over inner product, keyed by row position"""
+    name = 'faiss'
+
+    def __init__(self, nlist=0, nprobe=8):
+        import faiss
+        self.faiss = faiss
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.index = None
+
+    def build(self, matrix):
+        rows = matrix.rows[:matrix.size]
+        if not len(rows):
+            self.index = None
+            return
+        nlist = min(self.nlist or max(1, int(np.sqrt(len(rows)))), len(rows))
+        quantizer = self.faiss.IndexFlatIP(rows.shape[1])
+        index = self.faiss.IndexIVFFlat(quantizer, rows.shape[1], nlist, self.faiss.METRIC_INNER_PRODUCT)
+        index.train(rows)
+        index.add_with_ids(rows, np.arange(len(rows), dtype=np.int64))
+        index.nprobe = self.nprobe
+        # The quantizer must outlive this method
+        self.quantizer, self.index = quantizer, index
+
+    def on_set(self, matrix, position):
+        if self.index is None:
+            return self.build(matrix)
+        ids = np.array([position], dtype=np.int64)
+        self.index.remove_ids(ids)
+        self.index.add_with_ids(matrix.rows[position:position + 1], ids)
+
+    def on_remove(self, matrix, position, last):
+        self.index.remove_ids(np.array([position, last], dtype=np.int64))
+        if position != last:
+            self.index.add_with_ids(
+                matrix.rows[position:position + 1], np.array([position], dtype=np.int64)
+            )
+
+    def candidates(self, matrix, query, k):
+        if self.index is None or not matrix.size:
+            return np.empty(0, dtype=np.intp)
+        _, labels = self.index.search(query.reshape(1, -1).astype(np.float32), k)
+        return labels[0][labels[0] >= 0]
+
+
+class HnswlibSearcher:
+    """hnswlib HNSW graph over inner product, keyed by row position"""
+    name = 'hnswlib'
+
+    def __init__(self, ef=64, m=16, ef_construction=200):
+        import hnswlib
+        self.hnswlib = hnswlib
+        self.ef = ef
+        self.m = m
+        self.ef_construction = ef_construction
+        self.index = None
+
+    def build(self, matrix):
+        if not matrix.rows.shape[1]:
+            self.index = None
+            return
+        self.index = self.hnswlib.Index(space='ip', dim=matrix.rows.shape[1])
+        self.index.init_index(
+            max_elements=max(1024, len(matrix.rows)), ef_construction=self.ef_construction, M=self.m
+        )
+        if matrix.size:
+            self.index.add_items(matrix.rows[:matrix.size], np.arange(matrix.size))
+
+    def on_set(self, matrix, position):
+        if self.index is None:
+            return self.build(matrix)
+        if self.index.get_max_elements() <= position:
+            self.index.resize_index(max(2 * self.index.get_max_elements(), position + 1))
+        self.index.add_items(matrix.rows[position:position + 1], [position])
+
+    def on_remove(self, matrix, position, last):
+        if position != last:
+            self.index.add_items(matrix.rows[position:position + 1], [position])
+        self.index.mark_deleted(last)
+
+    def candidates(self, matrix, query, k):
+        k = min(k, matrix.size)
+        if self.index is None or not k:
+            return np.empty(0, dtype=np.intp)
+        self.index.set_ef(max(self.ef, k))
+        labels, _ = self.index.knn_query(query, k=k)
+        return labels[0].astype(np.intp)
+
+
+SEARCHERS = {
+    'exact': ExactSearcher,
+    'ivf': IVFSearcher,
+    'faiss': FaissSearcher,
+    'hnswlib': HnswlibSearcher,
+}
+
+
+def make_searcher(population, backend=None):
+    """Searcher for an index of `population` rows according to settings
+
+    Small populations always use exact search, which is both faster and
+    exact below a few thousand rows.
+    """
+    backend = backend or settings.MATCHING_ANN_BACKEND
+    if backend not in SEARCHERS:
+        raise ImproperlyConfigured(
+            f"MATCHING_ANN_BACKEND must be one of {', '.join(SEARCHERS)}, not {backend!r}"
+        )
+    if backend == 'exact' or population < settings.MATCHING_ANN_MIN_SIZE:
+        return ExactSearcher()
+    if backend == 'hnswlib':
+        return HnswlibSearcher(ef=settings.MATCHING_ANN_EF)
+    return SEARCHERS[backend](nlist=settings.MATCHING_ANN_NLIST, nprobe=settings.MATCHING_ANN_NPROBE)
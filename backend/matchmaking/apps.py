@@ -3,4 +3,29 @@ from django.apps import AppConfig
 
 class MatchmakingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'matchmaking'
\ No newline at end of file
+    name = 'matchmaking'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from quicksync.metrics import registry
+        from .embeddings import text_cache
+        from .result_cache import result_cache
+        from .versions import check_shared_cache
+
+        check_shared_cache()
+
+        @registry.collector
+        def cache_metrics():
+            text, results = text_cache.stats(), result_cache.stats()
+            return [
+                ('cache_hits_total', 'counter', 'Cache hits by cache and tier',
+                 {'cache': 'text_embeddings', 'tier': 'memory'}, text['memory_hits']),
+                ('cache_hits_total', 'counter', '',
+                 {'cache': 'text_embeddings', 'tier': 'database'}, text['store_hits']),
+                ('cache_misses_total', 'counter', 'Cache misses by cache',
+                 {'cache': 'text_embeddings'}, text['misses']),
+                ('cache_hits_total', 'counter', '', {'cache': 'results', 'tier': 'shared'}, results['hits']),
+                ('cache_misses_total', 'counter', '', {'cache': 'results'}, results['misses']),
+                ('cache_seconds_saved_total', 'counter', 'Compute time avoided by cache hits',
+                 {'cache': 'results'}, results['seconds_saved']),
+            ]
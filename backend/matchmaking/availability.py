@@ -0,0 +1,96 @@
+"""
+Fixed-width bitmask encoding of weekly availability
+
+A user's `availability` JSON ({"Monday": ["9:00 AM", "Evening"], ...}) is
+compiled into one bit per (day, slot) pair, so the overlap between two users
+is a popcount of AND/OR and one user can be compared against many candidates
+with a few NumPy operations.
+"""
+import numpy as np
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+# Hourly slots offered by the heatmap page, then the coarse slots used by test data
+SLOTS = [
+    '9:00 AM', '10:00 AM', '11:00 AM', '12:00 PM', '1:00 PM', '2:00 PM', '3:00 PM',
+    '4:00 PM', '5:00 PM', '6:00 PM', '7:00 PM', '8:00 PM', '9:00 PM',
+    'Morning', 'Afternoon', 'Evening', 'Night',
+]
+BIT_COUNT = len(DAYS) * len(SLOTS)
+MASK_BYTES = (BIT_COUNT + 63) // 64 * 8  # Whole uint64 words
+
+_DAY_INDEX = {day.casefold(): index for index, day in enumerate(DAYS)}
+_SLOT_INDEX = {''.join(slot.split()).casefold(): index for index, slot in enumerate(SLOTS)}
+
+# Number of set bits in every byte value
+POPCOUNT_TABLE = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+
+def compile_availability(availability):
+    """Pack availability JSON into MASK_BYTES little-endian bytes
+
+    Days and slots are matched case-insensitively; unknown ones are ignored.
+    """
+    mask = 0
+    for day, slots in (availability or {}).items():
+        day_index = _DAY_INDEX.get(str(day).strip().casefold())
+        if day_index is None or not isinstance(slots, list):
+            continue
+        for slot in slots:
+            slot_index = _SLOT_INDEX.get(''.join(str(slot).split()).casefold())
+            if slot_index is not None:
+                mask |= 1 << (day_index * len(SLOTS) + slot_index)
+    return mask.to_bytes(MASK_BYTES, 'little')
+
+
+def to_int(bits):
+    return int.from_bytes(bits or b'', 'little')
+
+
+def slot_labels(mask):
+    """"Day_slot" labels of the bits set in an integer mask, in weekly order"""
+    return [
+        f"{DAYS[bit // len(SLOTS)]}_{SLOTS[bit % len(SLOTS)]}"
+        for bit in range(BIT_COUNT) if mask >> bit & 1
+    ]
+
+
+def unpack(bits):
+    """One 0/1 uint8 per (day, slot) bit of a packed mask, in bit order"""
+    padded = np.frombuffer(bytes(bits or b'').ljust(MASK_BYTES, b'\0'), dtype=np.uint8)
+    return np.unpackbits(padded, bitorder='little')[:BIT_COUNT]
+
+
+def overlap(bits1, bits2):
+    """(common slot count, combined slot count) of two packed masks"""
+    mask1, mask2 = to_int(bits1), to_int(bits2)
+    return (mask1 & mask2).bit_count(), (mask1 | mask2).bit_count()
+
+
+def as_matrix(bits_list):
+    """Stack packed masks into an (N, MASK_BYTES) uint8 array"""
+    if not bits_list:
+        return np.zeros((0, MASK_BYTES), dtype=np.uint8)
+    padded = b''.join(bytes(bits).ljust(MASK_BYTES, b'\0') for bits in bits_list)
+    return np.frombuffer(padded, dtype=np.uint8).reshape(len(bits_list), MASK_BYTES)
+
+
+def overlap_many(bits, matrix):
+    """Common and combined slot counts of one mask against every row of a matrix"""
+    query = np.frombuffer(bytes(bits).ljust(MASK_BYTES, b'\0'), dtype=np.uint8)
+    common = POPCOUNT_TABLE[matrix & query].sum(axis=1, dtype=np.int32)
+    combined = POPCOUNT_TABLE[matrix | query].sum(axis=1, dtype=np.int32)
+    return common, combined
+
+
+def common_to_all(matrix):
+    """Integer mask of the slots set in every row of a matrix"""
+    if not len(matrix):
+        return 0
+    return to_int(np.bitwise_and.reduce(matrix, axis=0).tobytes())
+
+
+def overlap_ratio(common, combined):
+    """Common / combined slots, 0 where neither side has any"""
+    common = np.asarray(common, dtype=np.float32)
+    combined = np.asarray(combined, dtype=np.float32)
+    return np.divide(common, combined, out=np.zeros_like(common), where=combined > 0)
@@ -0,0 +1,110 @@
+"""
+Per-process in-memory histogram of availability across the user base
+
+Every active user's packed availability is kept unpacked, one row of 0/1
+bits per user. The per-slot counts for everyone and for each event tag are
+maintained incrementally as profiles change, so the unfiltered heatmap is a
+copy of an array; skill and team filters sum the rows of the matching users.
+"""
+import numpy as np
+from . import availability
+from .text import normalize_term, normalize_terms
+from .versions import VersionedIndex
+
+
+class AvailabilityIndex(VersionedIndex):
+    """User id -> unpacked availability row, plus running per-slot counts"""
+    version_name = 'availability_index'
+
+    def __init__(self):
+        super().__init__()
+        self._reset()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _reset(self):
+        self._rows = {}
+        self._tags = {}
+        self._totals = np.zeros(availability.BIT_COUNT, dtype=np.int32)
+        self._tag_totals = {}
+        self._tag_users = {}
+
+    def _build(self):
+        from django.contrib.auth import get_user_model
+
+        self._reset()
+        users = get_user_model().objects.filter(is_active=True).values_list('id', 'availability_bits', 'event_tags')
+        for user_id, bits, event_tags in users.iterator(chunk_size=2000):
+            self._set(user_id, bits, event_tags)
+
+    def update_user(self, user_id, bits, event_tags, is_active=True):
+        """Re-count a user's availability (inactive users are dropped)"""
+        if is_active:
+            self._apply(lambda: self._set(user_id, bits, event_tags))
+        else:
+            self.remove_user(user_id)
+
+    def remove_user(self, user_id):
+        self._apply(lambda: self._unset(user_id))
+
+    def _set(self, user_id, bits, event_tags):
+        row = availability.unpack(bits)
+        tags = frozenset(normalize_terms(event_tags))
+        current = self._rows.get(user_id)
+        if current is not None and self._tags[user_id] == tags and np.array_equal(current, row):
+            return False
+        self._unset(user_id)
+        self._rows[user_id] = row
+        self._tags[user_id] = tags
+        self._totals += row
+        for tag in tags:
+            if tag not in self._tag_totals:
+                self._tag_totals[tag] = np.zeros(availability.BIT_COUNT, dtype=np.int32)
+                self._tag_users[tag] = 0
+            self._tag_totals[tag] += row
+            self._tag_users[tag] += 1
+        return True
+
+    def _unset(self, user_id):
+        row = self._rows.pop(user_id, None)
+        if row is None:
+            return False
+        self._totals -= row
+        for tag in self._tags.pop(user_id):
+            self._tag_totals[tag] -= row
+            self._tag_users[tag] -= 1
+            if not self._tag_users[tag]:
+                del self._tag_totals[tag], self._tag_users[tag]
+        return True
+
+    def histogram(self, event_tag=None, user_ids=None):
+        """(per-bit free user counts, users counted) for everyone or a subset
+
+        `event_tag` uses its maintained counts; `user_ids` (e.g. the members
+        of a team or the users with a skill) sums those users' rows, further
+        restricted to the event tag when both are given.
+        """
+        self.ensure_current()
+        tag = normalize_term(event_tag) if event_tag is not None else None
+        with self._lock:
+            if user_ids is None:
+                if event_tag is None:
+                    return self._totals.copy(), len(self._rows)
+                if tag not in self._tag_totals:
+                    return np.zeros(availability.BIT_COUNT, dtype=np.int32), 0
+                return self._tag_totals[tag].copy(), self._tag_users[tag]
+            rows = [
+                self._rows[user_id] for user_id in user_ids
+                if user_id in self._rows and (event_tag is None or tag in self._tags[user_id])
+            ]
+        if not rows:
+            return np.zeros(availability.BIT_COUNT, dtype=np.int32), 0
+        return np.sum(rows, axis=0, dtype=np.int32), len(rows)
+
+    def stats(self):
+        return {
+            **super().stats(),
+            'users': len(self),
+            'event_tags': len(self._tag_totals),
+        }
@@ -0,0 +1,127 @@
+"""
+Process-wide access to the sentence transformer used for matching
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from django.conf import settings
+from quicksync.metrics import registry, track
+from .text import normalize_term
+
+inference_seconds = registry.histogram('model_inference_seconds', 'Time spent in SentenceTransformer.encode')
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """Return the shared SentenceTransformer, loading it on first use"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            # Another thread may have finished loading while we waited
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
+                _model = SentenceTransformer(settings.MATCHING_MODEL_NAME)
+    return _model
+
+
+def is_model_loaded():
+    """Whether this process has loaded the model (reported by index_stats)"""
+    return _model is not None
+
+
+def warm_model():
+    """Load the model eagerly (called at WSGI import time when preloading is enabled)"""
+    get_model()
+
+
+class TextEmbeddingCache:
+    """Content-addressed text -> float32 vector cache
+
+    Lookups go through an in-process LRU, then the TextEmbedding table, and
+    only texts found in neither are sent to the model. The model in use is
+    part of the key, so switching models never serves stale vectors.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text):
+        return hashlib.sha256(f"{settings.MATCHING_MODEL_NAME}\0{text}".encode('utf-8')).hexdigest()
+
+    def encode(self, texts, batch_size=64):
+        """Vectors for `texts` as a float32 array, one row per text"""
+        from .models import TextEmbedding
+
+        texts = [normalize_term(text) for text in texts]
+        keys = {text: self.key(text) for text in texts}
+        found = {}
+        with self._lock:
+            for text, key in keys.items():
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    found[text] = vector
+            self.memory_hits += len(found)
+
+        missing = [text for text in keys if text not in found]
+        if missing:
+            stored = TextEmbedding.objects.filter(key__in=[keys[text] for text in missing])
+            by_key = {row.key: np.frombuffer(row.vector, dtype=np.float32) for row in stored}
+            for text in missing:
+                if keys[text] in by_key:
+                    found[text] = by_key[keys[text]]
+            self.store_hits += len(by_key)
+
+        to_encode = [text for text in keys if text not in found]
+        if to_encode:
+            self.misses += len(to_encode)
+            model = get_model()
+            with track('encode', histogram=inference_seconds, model=settings.MATCHING_MODEL_NAME):
+                encoded = np.asarray(model.encode(to_encode, batch_size=batch_size), dtype=np.float32)
+            TextEmbedding.objects.bulk_create(
+                [
+                    TextEmbedding(key=keys[text], text=text, vector=vector.tobytes())
+                    for text, vector in zip(to_encode, encoded)
+                ],
+                batch_size=500,
+                ignore_conflicts=True
+            )
+            found.update(zip(to_encode, encoded))
+
+        with self._lock:
+            for text in keys:
+                self._entries[keys[text]] = found[text]
+                self._entries.move_to_end(keys[text])
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([found[text] for text in texts])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.memory_hits + self.store_hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'memory_hits': self.memory_hits,
+            'store_hits': self.store_hits,
+            'misses': self.misses,
+            'hit_rate': (self.memory_hits + self.store_hits) / lookups if lookups else None,
+        }
+
+
+text_cache = TextEmbeddingCache(settings.MATCHING_TEXT_CACHE_SIZE)
@@ -0,0 +1,128 @@
+"""
+Per-process in-memory index of user embeddings
+
+The index is built once from UserEmbedding rows and then kept up to date
+row by row from model signals. Every change also bumps a version counter
+shared through Django's cache and logs the user ids it touched, so other
+processes (the embedding worker writes most rows) reload just those users
+on their next query instead of rebuilding.
+"""
+import numpy as np
+from .ann import make_searcher
+from .scoring import EmbeddingMatrix, embedding_row, query_vector
+from .versions import VersionedIndex
+
+
+class EmbeddingIndex(VersionedIndex):
+    """Contiguous float32 embedding rows plus a user id -> row map"""
+    version_name = 'embedding_index'
+
+    def __init__(self):
+        super().__init__()
+        self._matrix = None
+        self._searcher = None
+        self._positions = {}
+
+    def __len__(self):
+        return len(self._matrix) if self._matrix is not None else 0
+
+    def __contains__(self, user_id):
+        return user_id in self._positions
+
+    @staticmethod
+    def _queryset():
+        from accounts.models import UserEmbedding
+
+        return UserEmbedding.objects.filter(user__is_active=True).order_by('user_id')
+
+    def _build(self):
+        matrix = EmbeddingMatrix.from_queryset(self._queryset())
+        searcher = make_searcher(matrix.size)
+        searcher.build(matrix)
+        self._matrix, self._searcher = matrix, searcher
+        self._positions = {
+            int(user_id): position
+            for position, user_id in enumerate(matrix.user_ids[:matrix.size])
+        }
+
+    def upsert(self, user_id, skills, interests, combined):
+        """Add or replace the row for a user"""
+        self.upsert_many([(user_id, skills, interests, combined)])
+
+    def upsert_many(self, embeddings):
+        """Add or replace rows from (user_id, skills, interests, combined) tuples"""
+        def apply():
+            changed = False
+            for user_id, skills, interests, combined in embeddings:
+                if len(skills) and len(interests) and len(combined):
+                    changed |= self._set(user_id, embedding_row(skills, interests, combined))
+                else:
+                    changed |= self._unset(user_id)
+            return changed
+
+        self._apply(apply, changed=[int(user_id) for user_id, *_ in embeddings])
+
+    def remove(self, user_id):
+        """Drop the row for a user, if present"""
+        self._apply(lambda: self._unset(user_id), changed=[int(user_id)])
+
+    def _reload(self, user_ids):
+        loaded = EmbeddingMatrix.from_queryset(self._queryset().filter(user_id__in=user_ids))
+        if len(loaded) and self._matrix.size and loaded.rows.shape[1] != self._matrix.rows.shape[1]:
+            # Written by a model of another width; only a rebuild can tell
+            # which width wins
+            return False
+        for position in range(len(loaded)):
+            self._set(int(loaded.user_ids[position]), loaded.rows[position])
+        for user_id in set(user_ids) - {int(user_id) for user_id in loaded.user_ids[:loaded.size]}:
+            self._unset(user_id)
+        return True
+
+    def _set(self, user_id, row):
+        position = self._positions.get(user_id)
+        if position is None:
+            position = self._positions[user_id] = self._matrix.append(user_id, row)
+        elif np.array_equal(self._matrix.rows[position], row):
+            return False
+        else:
+            self._matrix.set_row(position, row)
+        self._searcher.on_set(self._matrix, position)
+        return True
+
+    def _unset(self, user_id):
+        position = self._positions.pop(user_id, None)
+        if position is None:
+            return False
+        last = len(self._matrix) - 1
+        moved = self._matrix.remove(position)
+        if moved is not None:
+            self._positions[moved] = position
+        self._searcher.on_remove(self._matrix, position, last)
+        return True
+
+    def search(self, skills, interests, combined, limit, exclude_ids=()):
+        """Top `limit` users by weighted embedding similarity
+
+        Candidates come from the configured searcher (exact or approximate)
+        and are then scored exactly.
+        """
+        self.ensure_current()
+        query = query_vector(skills, interests, combined)
+        with self._lock:
+            matrix = self._matrix
+            if not len(matrix):
+                return []
+            rows = self._searcher.candidates(matrix, query, limit + len(exclude_ids))
+            rows = rows[rows < len(matrix)]
+            if len(exclude_ids):
+                rows = rows[~np.isin(matrix.user_ids[rows], list(exclude_ids))]
+            scores = matrix.rows[rows] @ query
+            order = np.argsort(-scores, kind='stable')[:limit]
+            return matrix.describe(rows[order], scores[order], skills, interests, combined)
+
+    def stats(self):
+        return {
+            **super().stats(),
+            'backend': self._searcher.name if self._searcher else None,
+            'size': len(self),
+        }
@@ -0,0 +1,73 @@
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from matchmaking.embeddings import text_cache
+from matchmaking.models import ProjectSuggestion
+from matchmaking.services import MatchingService
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Re-embed the whole user population (and optionally all projects) in batches, reporting progress and throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk', type=int, default=1000, help='Users loaded per database round trip')
+        parser.add_argument('--batch-size', type=int, default=128, help='Texts per model.encode batch')
+        parser.add_argument('--force', action='store_true', help='Re-embed users whose profile is unchanged')
+        parser.add_argument('--projects', action='store_true', help='Also embed project suggestions')
+
+    def handle(self, *args, **options):
+        service = MatchingService()
+        queryset = User.objects.filter(is_active=True).order_by('id')
+        total = queryset.count()
+        totals = {'embedded': 0, 'skipped': 0, 'cleared': 0, 'texts': 0}
+        seen = 0
+        last_id = 0
+        started = time.perf_counter()
+
+        while True:
+            users = list(queryset.filter(id__gt=last_id)[:options['chunk']])
+            if not users:
+                break
+            stats = service.embed_users(users, force=options['force'], batch_size=options['batch_size'])
+            for key, value in stats.items():
+                totals[key] += value
+            seen += len(users)
+            last_id = users[-1].id
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{seen}/{total} users  embedded {totals["embedded"]}  skipped {totals["skipped"]}  '
+                f'{seen / elapsed:.1f} users/s  {totals["texts"] / elapsed:.1f} texts/s'
+            )
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Backfill finished in {elapsed:.1f}s: {totals["embedded"]} embedded, '
+            f'{totals["skipped"]} unchanged, {totals["cleared"]} cleared, {totals["texts"]} distinct texts'
+        ))
+        if options['projects']:
+            self.backfill_projects(service, options)
+
+        cache = text_cache.stats()
+        self.stdout.write(
+            f'Text cache: {cache["memory_hits"]} memory hits, {cache["store_hits"]} store hits, '
+            f'{cache["misses"]} encoded by the model'
+        )
+
+    def backfill_projects(self, service, options):
+        started = time.perf_counter()
+        totals = {'embedded': 0, 'skipped': 0}
+        last_id = 0
+        while True:
+            projects = list(ProjectSuggestion.objects.filter(id__gt=last_id).order_by('id')[:options['chunk']])
+            if not projects:
+                break
+            stats = service.embed_projects(projects, force=options['force'], batch_size=options['batch_size'])
+            for key, value in stats.items():
+                totals[key] += value
+            last_id = projects[-1].id
+        self.stdout.write(self.style.SUCCESS(
+            f'Projects finished in {time.perf_counter() - started:.1f}s: '
+            f'{totals["embedded"]} embedded, {totals["skipped"]} unchanged'
+        ))
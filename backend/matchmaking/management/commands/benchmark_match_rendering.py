@@ -0,0 +1,73 @@
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from accounts.serializers import UserSerializer
+from matchmaking.rendering import percent, render_query_matches, render_recommendations
+from matchmaking.serializers import MatchResultSerializer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Compare per-row DRF serialization of match results with the plain-dict rendering path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--results', type=int, default=50, help='Results per response')
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        user_ids = list(User.objects.order_by('id').values_list('id', flat=True)[:options['results']])
+        if not user_ids:
+            self.stderr.write('Need at least one user')
+            return
+        matches = [(user_id, 0.5, 0.25, 0.375) for user_id in user_ids]
+        users = User.objects.in_bulk(user_ids)
+        recommendations = [
+            {
+                'user': users[user_id], 'score': 0.7, 'skills_similarity': 0.6,
+                'interests_similarity': 0.5, 'combined_similarity': 0.55, 'similarity': 0.58,
+                'availability_overlap': 0.4, 'common_times': ['Monday_9:00 AM', 'Friday_Evening'],
+                'event_tag_overlap': 0.5, 'has_team': False,
+            }
+            for user_id in user_ids
+        ]
+
+        def serialize_query_matches():
+            # What FindMatchesView did before: load users, one serializer per row
+            loaded = User.objects.in_bulk([match[0] for match in matches])
+            return [
+                {
+                    **UserSerializer(loaded[user_id]).data,
+                    'skills_similarity': percent(skills),
+                    'interests_similarity': percent(interests),
+                    'combined_similarity': percent(score),
+                    'score': percent(score),
+                }
+                for user_id, skills, interests, score in matches
+            ]
+
+        if serialize_query_matches() != render_query_matches(matches):
+            self.stderr.write(self.style.WARNING('Query match payloads differ'))
+        if MatchResultSerializer(recommendations, many=True).data != render_recommendations(recommendations):
+            self.stderr.write(self.style.WARNING('Recommendation payloads differ'))
+
+        count = len(user_ids)
+        self.stdout.write(f'{count} results per response, {options["repeat"]} responses')
+        self.report('query matches', options['repeat'], serialize_query_matches, lambda: render_query_matches(matches))
+        self.report(
+            'recommendations', options['repeat'],
+            lambda: MatchResultSerializer(recommendations, many=True).data,
+            lambda: render_recommendations(recommendations)
+        )
+
+    def report(self, label, repeat, serializer_path, fast_path):
+        timings = []
+        for render in (serializer_path, fast_path):
+            started = time.perf_counter()
+            for _ in range(repeat):
+                render()
+            timings.append(1000 * (time.perf_counter() - started) / repeat)
+        self.stdout.write(
+            f'{label}: serializers {timings[0]:.2f} ms, plain dicts {timings[1]:.2f} ms '
+            f'per response ({timings[0] / timings[1]:.1f}x faster)'
+        )
@@ -0,0 +1,78 @@
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from accounts.models import UserEmbedding
+from matchmaking.ann import SEARCHERS, ExactSearcher
+from matchmaking.scoring import EmbeddingMatrix
+
+
+class Command(BaseCommand):
+    help = 'Measure recall@k and query latency of an approximate search backend against exact search'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backend', default='ivf', choices=[name for name in SEARCHERS if name != 'exact'])
+        parser.add_argument('--k', type=int, default=10)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--nlist', type=int, default=0)
+        parser.add_argument('--nprobe', type=int, default=8)
+        parser.add_argument(
+            '--synthetic', type=int, default=0,
+            help='Evaluate on this many clustered random users instead of the stored embeddings'
+        )
+        parser.add_argument('--dim', type=int, default=384, help='Embedding width for --synthetic')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        if options['synthetic']:
+            matrix = self.synthetic_matrix(rng, options['synthetic'], options['dim'])
+        else:
+            matrix = EmbeddingMatrix.from_queryset(UserEmbedding.objects.all())
+        if len(matrix) < options['k']:
+            self.stderr.write(f'Need at least {options["k"]} users, found {len(matrix)}')
+            return
+
+        if options['backend'] == 'hnswlib':
+            searcher = SEARCHERS['hnswlib']()
+        else:
+            searcher = SEARCHERS[options['backend']](nlist=options['nlist'], nprobe=options['nprobe'])
+        started = time.perf_counter()
+        searcher.build(matrix)
+        build_seconds = time.perf_counter() - started
+        exact = ExactSearcher()
+
+        k = options['k']
+        queries = rng.choice(len(matrix), min(options['queries'], len(matrix)), replace=False)
+        weights = np.repeat([0.5, 0.3, 0.2], matrix.dim).astype(np.float32)
+        hits = 0
+        exact_seconds = approx_seconds = 0.0
+        for row in queries:
+            query = matrix.rows[row] * weights
+            started = time.perf_counter()
+            expected = exact.candidates(matrix, query, k)
+            exact_seconds += time.perf_counter() - started
+            started = time.perf_counter()
+            found = searcher.candidates(matrix, query, k)
+            approx_seconds += time.perf_counter() - started
+            hits += len(np.intersect1d(expected, found))
+
+        count = len(queries)
+        self.stdout.write(f'users: {len(matrix)}  backend: {searcher.name}  build: {build_seconds:.2f}s')
+        self.stdout.write(f'recall@{k}: {hits / (k * count):.3f}')
+        self.stdout.write(
+            f'query latency: exact {1000 * exact_seconds / count:.2f} ms, '
+            f'{searcher.name} {1000 * approx_seconds / count:.2f} ms'
+        )
+
+    @staticmethod
+    def synthetic_matrix(rng, count, dim):
+        """Users scattered around a few hundred profile clusters"""
+        labels = rng.integers(max(1, count // 200), size=count)
+
+        def embeddings():
+            centers = rng.normal(size=(labels.max() + 1, dim)).astype(np.float32)
+            return centers[labels] + 0.6 * rng.normal(size=(count, dim)).astype(np.float32)
+
+        return EmbeddingMatrix(
+            np.arange(1, count + 1), embeddings(), embeddings(), embeddings()
+        )
@@ -0,0 +1,26 @@
+import time
+from django.core.management.base import BaseCommand
+from matchmaking.worker import process_pending_jobs
+
+
+class Command(BaseCommand):
+    help = 'Process queued embedding jobs with batched model inference'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=256, help='Jobs claimed per pass')
+        parser.add_argument('--batch-size', type=int, default=64, help='Texts per model.encode batch')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Embedding worker started')
+        while True:
+            started = time.perf_counter()
+            processed = process_pending_jobs(limit=options['limit'], batch_size=options['batch_size'])
+            if processed:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f'Embedded {processed} users in {elapsed:.2f}s')
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
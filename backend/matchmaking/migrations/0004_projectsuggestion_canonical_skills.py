@@ -0,0 +1,24 @@
+from django.db import migrations, models
+from accounts.models import backfill_terms
+
+
+def backfill_project_skills(apps, schema_editor):
+    ProjectSuggestion = apps.get_model('matchmaking', 'ProjectSuggestion')
+    backfill_terms(ProjectSuggestion, 'canonical_skills', 'required_skills')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_canonical_terms'),
+        ('matchmaking', '0003_textembedding'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectsuggestion',
+            name='canonical_skills',
+            field=models.ManyToManyField(blank=True, related_name='project_suggestions', to='accounts.skill'),
+        ),
+        migrations.RunPython(backfill_project_skills, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matchmaking', '0004_projectsuggestion_canonical_skills'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectsuggestion',
+            name='embedding',
+            field=models.BinaryField(default=bytes),
+        ),
+        migrations.AddField(
+            model_name='projectsuggestion',
+            name='embedding_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
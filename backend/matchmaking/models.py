@@ -1,5 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+import numpy as np
+from accounts.models import EMBEDDING_DTYPE
 
 User = get_user_model()
 
@@ -21,6 +23,9 @@ class ProjectSuggestion(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
     required_skills = models.JSONField(default=list)
+    canonical_skills = models.ManyToManyField(
+        'accounts.Skill', blank=True, related_name='project_suggestions'
+    )
     difficulty_level = models.CharField(
         max_length=20,
         choices=[
@@ -32,7 +37,35 @@ class ProjectSuggestion(models.Model):
     )
     estimated_duration = models.CharField(max_length=50, blank=True)  # e.g., "2-3 days"
     tech_stack = models.JSONField(default=list)
+    embedding = models.BinaryField(default=bytes)  # float32 bytes, see MatchingService.embed_projects
+    embedding_hash = models.CharField(max_length=64, blank=True)  # Hash of the embedded text
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return self.title
+
+    @property
+    def embedding_vector(self):
+        return np.frombuffer(self.embedding, dtype=EMBEDDING_DTYPE)
+
+class EmbeddingJob(models.Model):
+    """Pending embedding refresh for a user, picked up by the embedding worker"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='embedding_job')
+    force = models.BooleanField(default=False)  # Re-embed even if the profile text is unchanged
+    requested_at = models.DateTimeField(db_index=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    
+    def __str__(self):
+        return f"Embedding job for {self.user.username}"
+
+
+class TextEmbedding(models.Model):
+    """Persistent cache of model output for a normalized text"""
+    key = models.CharField(max_length=64, unique=True)  # sha256 of model name and text
+    text = models.TextField()
+    vector = models.BinaryField()  # float32 bytes
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return self.text[:50]
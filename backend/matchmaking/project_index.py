@@ -0,0 +1,104 @@
+"""
+Per-process in-memory index of project suggestion embeddings
+
+The catalog changes rarely, so changes only update a project id -> vector
+map and the contiguous matrix is restacked on the next search after one.
+Ranking a user against every project is then a single matrix-vector product.
+"""
+import numpy as np
+from .scoring import normalize, normalize_rows, top_k
+from .versions import VersionedIndex
+
+
+class ProjectIndex(VersionedIndex):
+    """Pre-normalized float32 project vectors"""
+    version_name = 'project_index'
+
+    def __init__(self):
+        super().__init__()
+        self._vectors = {}
+        self._project_ids = np.zeros(0, dtype=np.int64)
+        self._rows = np.zeros((0, 0), dtype=np.float32)
+        self._dirty = False
+
+    def __len__(self):
+        return len(self._vectors)
+
+    def _build(self):
+        from .models import ProjectSuggestion
+
+        rows = [
+            (project_id, np.frombuffer(embedding, dtype=np.float32))
+            for project_id, embedding in ProjectSuggestion.objects.exclude(embedding_hash='')
+            .order_by('id').values_list('id', 'embedding')
+            if len(embedding)
+        ]
+        if rows:
+            # Rows written by a model of another width cannot be compared
+            width = len(rows[-1][1])
+            rows = [(project_id, vector) for project_id, vector in rows if len(vector) == width]
+            vectors = normalize_rows(np.stack([vector for _, vector in rows]))
+            self._vectors = {project_id: vector for (project_id, _), vector in zip(rows, vectors)}
+        else:
+            self._vectors = {}
+        self._dirty = True
+
+    def upsert_many(self, embeddings):
+        """Add or replace vectors from (project_id, vector) pairs"""
+        def apply():
+            changed = False
+            for project_id, vector in embeddings:
+                if not len(vector):
+                    changed |= self._unset(project_id)
+                    continue
+                vector = normalize(vector)
+                width = self._width()
+                if width is not None and width != len(vector):
+                    raise ValueError(
+                        f'Embedding width {len(vector)} does not match index width {width}'
+                    )
+                current = self._vectors.get(project_id)
+                if current is None or not np.array_equal(current, vector):
+                    self._vectors[project_id] = vector
+                    changed = True
+            self._dirty |= changed
+            return changed
+
+        self._apply(apply)
+
+    def remove(self, project_id):
+        self._apply(lambda: self._unset(project_id))
+
+    def _unset(self, project_id):
+        if self._vectors.pop(project_id, None) is None:
+            return False
+        self._dirty = True
+        return True
+
+    def _width(self):
+        return len(next(iter(self._vectors.values()))) if self._vectors else None
+
+    def _restack(self):
+        if self._vectors:
+            self._project_ids = np.fromiter(self._vectors, dtype=np.int64, count=len(self._vectors))
+            self._rows = np.ascontiguousarray(np.stack(list(self._vectors.values())))
+        else:
+            self._project_ids = np.zeros(0, dtype=np.int64)
+            self._rows = np.zeros((0, 0), dtype=np.float32)
+        self._dirty = False
+
+    def search(self, vector, limit):
+        """Best `limit` (project_id, similarity) pairs for a query vector"""
+        self.ensure_current()
+        query = normalize(vector)
+        with self._lock:
+            if self._dirty:
+                self._restack()
+            if not len(self._rows) or self._rows.shape[1] != len(query):
+                return []
+            scores = self._rows @ query
+            rows = top_k(scores, limit)
+            return [(int(self._project_ids[row]), float(scores[row])) for row in rows]
+
+    def stats(self):
+        return {**super().stats(), 'size': len(self)}
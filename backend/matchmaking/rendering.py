@@ -0,0 +1,79 @@
+"""
+Match responses built as plain dicts instead of per-row DRF serializers
+
+Produces the same JSON as the serializers previously used for these
+endpoints (UserSerializer for query matches, MatchResultSerializer for
+recommendations) at a fraction of the cost per row.
+"""
+from django.contrib.auth import get_user_model
+from rest_framework import serializers
+from accounts.serializers import UserMatchSerializer, UserSerializer
+
+User = get_user_model()
+
+QUERY_USER_FIELDS = UserSerializer.Meta.fields
+MATCH_USER_FIELDS = UserMatchSerializer.Meta.fields
+DATETIME_FIELDS = {'created_at', 'updated_at'}
+# Optional float features of MatchingService.recommend results, in response order
+RESULT_FLOAT_FIELDS = [
+    'score', 'skills_similarity', 'interests_similarity', 'combined_similarity',
+    'similarity', 'availability_overlap',
+]
+
+# Formats datetimes exactly as the serializers do (settings-aware ISO 8601)
+_datetime_field = serializers.DateTimeField()
+
+
+def user_rows(user_ids, fields):
+    """User id -> response dict of `fields`, loaded with one .values() query"""
+    rows = {}
+    for row in User.objects.filter(id__in=user_ids).values(*fields):
+        for field in DATETIME_FIELDS.intersection(fields):
+            if row[field] is not None:
+                row[field] = _datetime_field.to_representation(row[field])
+        rows[row['id']] = row
+    return rows
+
+
+def percent(value):
+    """Similarity as a whole percentage clamped to 0-100"""
+    return max(0, min(100, int(round(value * 100))))
+
+
+def render_query_matches(matches):
+    """Response rows for (user_id, skills, interests, score) tuples, in order"""
+    rows = user_rows([match[0] for match in matches], QUERY_USER_FIELDS)
+    return [
+        {
+            **rows[user_id],
+            'skills_similarity': percent(skills_similarity),
+            'interests_similarity': percent(interests_similarity),
+            'combined_similarity': percent(score),
+            'score': percent(score),
+        }
+        for user_id, skills_similarity, interests_similarity, score in matches
+        if user_id in rows
+    ]
+
+
+def render_recommendations(results):
+    """Response rows for MatchingService.recommend results
+
+    The candidate users were already loaded (in one query) for re-ranking,
+    so their fields are read from the instances rather than fetched again.
+    """
+    rendered = []
+    for result in results:
+        user = result['user']
+        row = {'user': {field: getattr(user, field) for field in MATCH_USER_FIELDS}}
+        for field in RESULT_FLOAT_FIELDS:
+            if field in result:
+                row[field] = float(result[field])
+        if 'common_times' in result:
+            row['common_times'] = list(result['common_times'])
+        if 'event_tag_overlap' in result:
+            row['event_tag_overlap'] = float(result['event_tag_overlap'])
+        if 'has_team' in result:
+            row['has_team'] = bool(result['has_team'])
+        rendered.append(row)
+    return rendered
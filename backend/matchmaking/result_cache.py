@@ -0,0 +1,104 @@
+"""
+Cache of rendered recommendation and match query responses
+
+Entries live in Django's cache and are keyed by the request (user id or
+normalized query, limit) together with the versions of everything the result
+was computed from: the shared index versions and, for recommendations, the
+requester's profile version and a team membership version. Bumping any of
+them makes old entries unreachable, so nothing has to be deleted; they age
+out after the TTL.
+"""
+import hashlib
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from .text import normalize_terms
+from .versions import bump_version, get_versions
+
+KEY_PREFIX = 'matchmaking:results:'
+
+
+def profile_version_name(user_id):
+    return f'profile:{user_id}'
+
+
+def profile_saved(user_id):
+    """Invalidate the cached results computed for a user"""
+    bump_version(profile_version_name(user_id))
+
+
+class ResultCache:
+    """Get-or-compute over Django's cache, with process-local hit counters
+
+    The time each entry took to compute is stored with it, so hits can
+    report how much latency they saved.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.seconds_saved = 0.0
+        self.seconds_computing = 0.0
+
+    @staticmethod
+    def key(kind, parts, versions):
+        raw = repr((kind, parts, list(zip(versions, get_versions(versions)))))
+        return KEY_PREFIX + kind + ':' + hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get_or_compute(self, kind, parts, versions, compute):
+        """Cached `compute()` for a request; `versions` name what it depends on"""
+        if not self.ttl:
+            return compute()
+        key = self.key(kind, parts, versions)
+        entry = cache.get(key)
+        if entry is not None:
+            value, seconds = entry
+            with self._lock:
+                self.hits += 1
+                self.seconds_saved += seconds
+            return value
+        started = time.perf_counter()
+        value = compute()
+        seconds = time.perf_counter() - started
+        cache.set(key, (value, seconds), timeout=self.ttl)
+        with self._lock:
+            self.misses += 1
+            self.seconds_computing += seconds
+        return value
+
+    def recommendations(self, user, limit, compute):
+        return self.get_or_compute(
+            'recommendations',
+            (user.id, limit),
+            (
+                'embedding_index', 'term_index', 'availability_index', 'team_memberships',
+                profile_version_name(user.id)
+            ),
+            compute
+        )
+
+    def query_matches(self, skills, interests, limit, compute):
+        return self.get_or_compute(
+            'query',
+            (normalize_terms(skills), normalize_terms(interests), limit),
+            ('term_index',),
+            compute
+        )
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else None,
+            'seconds_saved': self.seconds_saved,
+            'seconds_computing': self.seconds_computing,
+            'average_miss_seconds': self.seconds_computing / self.misses if self.misses else None,
+        }
+
+
+result_cache = ResultCache(settings.MATCHING_RESULT_CACHE_TTL)
@@ -0,0 +1,182 @@
+"""
+Vectorized similarity scoring over precomputed user embeddings
+"""
+import numpy as np
+
+# Weights of the combined, skills and interests similarities in the overall score
+COMBINED_WEIGHT = 0.5
+SKILLS_WEIGHT = 0.3
+INTERESTS_WEIGHT = 0.2
+
+
+def normalize(vector):
+    """Return a float32 unit vector (zero vectors stay zero)"""
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        return vector
+    return vector / norm
+
+
+def normalize_rows(matrix):
+    """Return a float32 copy of matrix with every row scaled to unit length"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def top_k(scores, k):
+    """Indices of the k highest scores, best first"""
+    if k <= 0 or len(scores) == 0:
+        return np.empty(0, dtype=np.intp)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+def embedding_row(skills, interests, combined):
+    """Stored layout of one user: normalized [combined | skills | interests]"""
+    return np.concatenate([normalize(combined), normalize(skills), normalize(interests)])
+
+
+def query_vector(skills, interests, combined):
+    """Query layout matching embedding_row, scaled by the score weights"""
+    return np.concatenate([
+        COMBINED_WEIGHT * normalize(combined),
+        SKILLS_WEIGHT * normalize(skills),
+        INTERESTS_WEIGHT * normalize(interests),
+    ])
+
+
+class EmbeddingMatrix:
+    """Pre-normalized float32 embedding rows for a set of users
+
+    Each row holds the three embeddings of a user side by side, so a single
+    matrix-vector product with a query_vector yields every overall score.
+    Rows can be replaced, appended and removed in place; storage grows
+    geometrically and only the first `size` rows are live.
+    """
+
+    def __init__(self, user_ids, skills, interests, combined):
+        self.user_ids = np.array(user_ids, dtype=np.int64)
+        self.size = len(self.user_ids)
+        if self.size:
+            self.rows = np.ascontiguousarray(np.hstack([
+                normalize_rows(combined), normalize_rows(skills), normalize_rows(interests)
+            ]))
+        else:
+            self.rows = np.zeros((0, 0), dtype=np.float32)
+
+    def __len__(self):
+        return self.size
+
+    @classmethod
+    def from_queryset(cls, queryset):
+        """Build the matrix from a UserEmbedding queryset
+
+        Vectors are stored as float32 bytes, so each column is assembled by
+        concatenating the raw bytes and viewing them as one 2-D array.
+        """
+        rows = [
+            row for row in queryset.values_list(
+                'user_id', 'skills_embedding', 'interests_embedding', 'combined_embedding'
+            )
+            if len(row[1]) and len(row[1]) == len(row[2]) == len(row[3])
+        ]
+        if rows:
+            # Rows written by a model of another width cannot be compared
+            width = len(rows[-1][1])
+            rows = [row for row in rows if len(row[1]) == width]
+        if not rows:
+            return cls([], [], [], [])
+        user_ids, skills, interests, combined = zip(*rows)
+        return cls(user_ids, *(
+            np.frombuffer(b''.join(column), dtype=np.float32).reshape(len(rows), -1)
+            for column in (skills, interests, combined)
+        ))
+
+    @property
+    def dim(self):
+        return self.rows.shape[1] // 3
+
+    @property
+    def combined(self):
+        return self.rows[:self.size, :self.dim]
+
+    @property
+    def skills(self):
+        return self.rows[:self.size, self.dim:2 * self.dim]
+
+    @property
+    def interests(self):
+        return self.rows[:self.size, 2 * self.dim:]
+
+    def set_row(self, position, row):
+        self.rows[position] = row
+
+    def append(self, user_id, row):
+        """Add a row and return its position"""
+        if self.rows.shape[1] != len(row):
+            if self.size:
+                raise ValueError(
+                    f'Embedding width {len(row)} does not match index width {self.rows.shape[1]}'
+                )
+            self.rows = np.zeros((0, len(row)), dtype=np.float32)
+        if self.size == len(self.rows):
+            capacity = max(16, 2 * len(self.rows))
+            rows = np.zeros((capacity, self.rows.shape[1]), dtype=np.float32)
+            rows[:self.size] = self.rows[:self.size]
+            user_ids = np.zeros(capacity, dtype=np.int64)
+            user_ids[:self.size] = self.user_ids[:self.size]
+            self.rows, self.user_ids = rows, user_ids
+        self.rows[self.size] = row
+        self.user_ids[self.size] = user_id
+        self.size += 1
+        return self.size - 1
+
+    def remove(self, position):
+        """Remove a row by moving the last row into its place
+
+        Returns the user id of the moved row, or None if nothing moved.
+        """
+        last = self.size - 1
+        moved = None
+        if position != last:
+            self.rows[position] = self.rows[last]
+            self.user_ids[position] = self.user_ids[last]
+            moved = int(self.user_ids[position])
+        self.size -= 1
+        return moved
+
+    def score(self, query):
+        """Overall score of every live row against a query_vector"""
+        if not self.size:
+            return np.zeros(0, dtype=np.float32)
+        return self.rows[:self.size] @ query
+
+    def component_similarities(self, rows, skills, interests, combined):
+        """Per-embedding cosine similarities for the given row indices"""
+        return (
+            self.skills[rows] @ normalize(skills),
+            self.interests[rows] @ normalize(interests),
+            self.combined[rows] @ normalize(combined),
+        )
+
+    def describe(self, rows, scores, skills, interests, combined):
+        """Result dicts for the given row indices and their overall scores"""
+        skills_sim, interests_sim, combined_sim = self.component_similarities(
+            rows, skills, interests, combined
+        )
+        return [
+            {
+                'user_id': int(self.user_ids[row]),
+                'score': float(scores[i]),
+                'skills_similarity': float(skills_sim[i]),
+                'interests_similarity': float(interests_sim[i]),
+                'combined_similarity': float(combined_sim[i]),
+            }
+            for i, row in enumerate(rows)
+        ]
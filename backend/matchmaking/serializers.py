@@ -10,6 +10,12 @@ class MatchResultSerializer(serializers.Serializer):
     skills_similarity = serializers.FloatField(read_only=True)
     interests_similarity = serializers.FloatField(read_only=True)
     combined_similarity = serializers.FloatField(read_only=True)
+    # Re-ranking features, present on MatchingService.recommend results
+    similarity = serializers.FloatField(read_only=True)
+    availability_overlap = serializers.FloatField(read_only=True)
+    common_times = serializers.ListField(child=serializers.CharField(), read_only=True)
+    event_tag_overlap = serializers.FloatField(read_only=True)
+    has_team = serializers.BooleanField(read_only=True)
 
 
 class AvailabilityOverlapSerializer(serializers.Serializer):
@@ -18,6 +24,22 @@ class AvailabilityOverlapSerializer(serializers.Serializer):
     common_times = serializers.ListField(child=serializers.CharField(), read_only=True)
 
 
+class AvailabilityBatchSerializer(serializers.Serializer):
+    """Request body of the batch availability overlap endpoint"""
+    firebase_uid = serializers.CharField(required=False)
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        max_length=500
+    )
+    team_id = serializers.IntegerField(required=False, min_value=1)
+
+    def validate(self, data):
+        if not data.get('user_ids') and 'team_id' not in data:
+            raise serializers.ValidationError('Provide user_ids or team_id')
+        return data
+
+
 class MatchingQuerySerializer(serializers.Serializer):
     """Serializer for matching query parameters"""
     skills = serializers.ListField(
@@ -34,10 +56,15 @@ class MatchingQuerySerializer(serializers.Serializer):
 
 
 class ProjectSuggestionSerializer(serializers.ModelSerializer):
+    # Only present when the queryset is ranked against a user's skills
+    skill_overlap = serializers.IntegerField(read_only=True)
+    # Only present on embedding-based recommendations
+    similarity = serializers.FloatField(read_only=True)
+
     class Meta:
         model = ProjectSuggestion
         fields = [
             'id', 'title', 'description', 'required_skills',
             'difficulty_level', 'estimated_duration', 'tech_stack',
-            'created_at'
+            'created_at', 'skill_overlap', 'similarity'
         ]
\ No newline at end of file
@@ -5,11 +5,49 @@ import json
 import numpy as np
 from typing import List, Dict, Any
 from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q, Value
+from django.utils import timezone
 from accounts.models import UserEmbedding
-from sentence_transformers import SentenceTransformer
+from quicksync.metrics import instrument
+from . import availability
+from .availability_index import AvailabilityIndex
+from .embeddings import get_model, text_cache
+from .index import EmbeddingIndex
+from .models import EmbeddingJob, ProjectSuggestion
+from .project_index import ProjectIndex
+from .term_index import TermIndex
+from .text import normalize_terms, profile_texts, project_text, content_hash
 
 User = get_user_model()
 
+# Shared by every MatchingService in this process
+embedding_index = EmbeddingIndex()
+term_index = TermIndex()
+project_index = ProjectIndex()
+availability_index = AvailabilityIndex()
+
+
+def schedule_embedding(user, force=False):
+    """Queue a user's embedding for the background worker
+
+    With MATCHING_EMBEDDING_QUEUE disabled the embedding is computed in this
+    process instead, once the current transaction commits.
+    """
+    if not settings.MATCHING_EMBEDDING_QUEUE:
+        transaction.on_commit(lambda: MatchingService().create_user_embedding(user, force=force))
+        return
+    job, created = EmbeddingJob.objects.get_or_create(
+        user=user,
+        defaults={'force': force, 'requested_at': timezone.now()}
+    )
+    if not created:
+        job.force = job.force or force
+        job.requested_at = timezone.now()
+        job.attempts = 0
+        job.save(update_fields=['force', 'requested_at', 'attempts'])
+
 
 class MatchingService:
     def cosine_similarity(self, a, b):
@@ -20,94 +58,197 @@ class MatchingService:
         if np.linalg.norm(a) == 0 or np.linalg.norm(b) == 0:
             return 0.0
         return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
-    def find_matches_by_query(self, skills=None, interests=None, limit=20):
+    @instrument('matching.score_query')
+    def score_query(self, skills=None, interests=None, limit=20):
+        """(user_id, skills_similarity, interests_similarity, score) tuples, best first"""
         # If no query, return empty list
         if not skills and not interests:
             return []
 
-        # Get all users except those with empty skills/interests
-        users = User.objects.all()
-        candidates = []
-        for user in users:
-            user_skills = getattr(user, 'skills', []) or []
-            user_interests = getattr(user, 'interests', []) or []
-            if user_skills or user_interests:
-                candidates.append(user)
-
-        # Compute Jaccard similarity for skills and interests
-        def jaccard(query, user):
-            # Lowercase all skills/interests for case-insensitive matching
-            set_query = set([str(q).strip().lower() for q in query])
-            set_user = set([str(u).strip().lower() for u in user])
-            if not set_query:
-                return 0.0
-            intersection = set_query & set_user
-            # Use only the number of searched items for denominator
-            return float(len(intersection)) / float(len(set_query))
+        # Only users sharing at least one term with the query are scored
+        return term_index.search(skills, interests, limit)
 
+    def find_matches_by_query(self, skills=None, interests=None, limit=20):
+        matches = self.score_query(skills, interests, limit)
+
+        users = User.objects.in_bulk([match[0] for match in matches])
         results = []
-        for user in candidates:
-            user_skills = getattr(user, 'skills', []) or []
-            user_interests = getattr(user, 'interests', []) or []
-            skills_similarity = jaccard(skills, user_skills)
-            interests_similarity = jaccard(interests, user_interests)
-            # Combined: average of both if both provided, else whichever is present
-            if skills and interests:
-                combined_similarity = (skills_similarity + interests_similarity) / 2
-            elif skills:
-                combined_similarity = skills_similarity
-            elif interests:
-                combined_similarity = interests_similarity
-            else:
-                combined_similarity = 0.0
-            score = combined_similarity
+        for user_id, skills_similarity, interests_similarity, score in matches:
+            user = users.get(user_id)
+            if user is None:
+                continue
             results.append({
                 'user': user,
                 'skills_similarity': skills_similarity,
                 'interests_similarity': interests_similarity,
-                'combined_similarity': combined_similarity,
+                'combined_similarity': score,
                 'score': score
             })
-
-        # Sort by score and return top N
-        results.sort(key=lambda x: x['score'], reverse=True)
-        return results[:limit]
+        return results
     """Service for AI-powered user matching"""
-    def __init__(self):
-        # Use real Hugging Face model
-        self.model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
-        self.using_mock = False
+    using_mock = False
+
+    @property
+    def model(self):
+        # Shared per process; query matching never touches it, so it is only
+        # loaded when an embedding actually has to be computed
+        return get_model()
     
-    def create_user_embedding(self, user: User) -> Dict[str, List[float]]:
-        """Create embeddings for a user's skills and interests"""
-        # Combine skills and interests into text
-        skills_text = " ".join(user.skills) if user.skills else ""
-        interests_text = " ".join(user.interests) if user.interests else ""
-        combined_text = f"{skills_text} {interests_text}".strip()
-        
-        # Generate embeddings
-        texts = [skills_text, interests_text, combined_text]
-        embeddings = self.model.encode(texts)
-        
-        embedding_data = {
-            'skills_embedding': embeddings[0].tolist(),
-            'interests_embedding': embeddings[1].tolist(), 
-            'combined_embedding': embeddings[2].tolist()
+    def create_user_embedding(self, user: User, force: bool = False) -> Dict[str, np.ndarray]:
+        """Create embeddings for a user's skills and interests
+
+        Embeddings are derived from the profile, so they are only recomputed
+        when the normalized skills/interests text changed (or `force` is set).
+        Users with neither skills nor interests get no embedding.
+        """
+        self.embed_users([user], force=force)
+        user_embedding = UserEmbedding.objects.filter(user=user).first()
+        if user_embedding is None:
+            return None
+        return {
+            'skills_embedding': user_embedding.skills_vector,
+            'interests_embedding': user_embedding.interests_vector,
+            'combined_embedding': user_embedding.combined_vector
         }
-        
-        # Store in database
-        user_embedding, created = UserEmbedding.objects.get_or_create(
-            user=user,
-            defaults=embedding_data
+
+    @instrument('matching.embed_users')
+    def embed_users(self, users, force: bool = False, batch_size: int = 64) -> Dict[str, int]:
+        """Bring the embeddings of many users up to date with batched inference
+
+        Users whose profile text is unchanged are skipped unless `force` is
+        set. Each distinct text is looked up in the text embedding cache and
+        only cache misses reach the model. Rows are written with
+        bulk_create/bulk_update. Returns counts of what was done.
+        """
+        users = list(users)
+        existing = {
+            user_embedding.user_id: user_embedding
+            for user_embedding in UserEmbedding.objects.filter(user__in=users).only('id', 'user_id', 'content_hash')
+        }
+        stats = {'embedded': 0, 'skipped': 0, 'cleared': 0, 'texts': 0}
+        pending = []
+        cleared = []
+        for user in users:
+            texts = profile_texts(user)
+            digest = content_hash(texts)
+            current = existing.get(user.id)
+            if not texts[2]:
+                if current is not None:
+                    cleared.append(current.id)
+                continue
+            if current is not None and current.content_hash == digest and not force:
+                stats['skipped'] += 1
+                continue
+            pending.append((user, texts, digest))
+
+        unique_texts = list(dict.fromkeys(text for _, texts, _ in pending for text in texts))
+        vectors = {}
+        if unique_texts:
+            encoded = text_cache.encode(unique_texts, batch_size=batch_size)
+            vectors = dict(zip(unique_texts, encoded))
+
+        now = timezone.now()
+        to_create, to_update = [], []
+        for user, texts, digest in pending:
+            user_embedding = existing.get(user.id) or UserEmbedding(user=user)
+            user_embedding.set_vectors(vectors[texts[0]], vectors[texts[1]], vectors[texts[2]])
+            user_embedding.content_hash = digest
+            user_embedding.last_updated = now
+            (to_update if user_embedding.pk else to_create).append(user_embedding)
+
+        with transaction.atomic():
+            UserEmbedding.objects.bulk_create(to_create, batch_size=500)
+            UserEmbedding.objects.bulk_update(
+                to_update,
+                ['skills_embedding', 'interests_embedding', 'combined_embedding', 'content_hash', 'last_updated'],
+                batch_size=200
+            )
+            UserEmbedding.objects.filter(id__in=cleared).delete()
+            # Bulk writes bypass model signals, so patch the index directly
+            written = [
+                (e.user_id, e.skills_vector, e.interests_vector, e.combined_vector)
+                for e in to_create + to_update
+            ]
+            if written:
+                transaction.on_commit(lambda: embedding_index.upsert_many(written))
+
+        stats['embedded'] = len(pending)
+        stats['cleared'] = len(cleared)
+        stats['texts'] = len(unique_texts)
+        return stats
+
+    def embed_projects(self, projects, force: bool = False, batch_size: int = 64) -> Dict[str, int]:
+        """Bring the embeddings of many project suggestions up to date in one batch
+
+        Works like embed_users: unchanged projects are skipped unless `force`
+        is set, texts go through the text embedding cache, and rows are
+        written with bulk_update.
+        """
+        pending = []
+        skipped = 0
+        for project in projects:
+            text = project_text(project)
+            digest = content_hash([text])
+            if project.embedding_hash == digest and len(project.embedding) and not force:
+                skipped += 1
+                continue
+            pending.append((project, text, digest))
+
+        if pending:
+            encoded = text_cache.encode([text for _, text, _ in pending], batch_size=batch_size)
+            for (project, _, digest), vector in zip(pending, encoded):
+                project.embedding = vector.tobytes()
+                project.embedding_hash = digest
+
+            with transaction.atomic():
+                ProjectSuggestion.objects.bulk_update(
+                    [project for project, _, _ in pending],
+                    ['embedding', 'embedding_hash'],
+                    batch_size=200
+                )
+                # Bulk writes bypass model signals, so patch the index directly
+                written = [(project.id, project.embedding_vector) for project, _, _ in pending]
+                transaction.on_commit(lambda: project_index.upsert_many(written))
+
+        return {'embedded': len(pending), 'skipped': skipped}
+
+    def projects_by_skill_overlap(self, user: User):
+        """Projects sharing a canonical skill with the user, most shared first
+
+        The join and count run in the database over the skill M2M tables.
+        """
+        return (
+            ProjectSuggestion.objects
+            .filter(canonical_skills__in=user.canonical_skills.all())
+            .annotate(skill_overlap=Count('canonical_skills'))
+            .order_by('-skill_overlap', 'id')
         )
-        
-        if not created:
-            # Update existing embedding
-            for key, value in embedding_data.items():
-                setattr(user_embedding, key, value)
-            user_embedding.save()
-        
-        return embedding_data
+
+    def recommend_projects(self, user: User, limit: int = 10):
+        """Projects closest to the user's combined embedding, best first
+
+        Returns (project, similarity) pairs, or None if the user has no
+        embedding yet.
+        """
+        user_embedding = UserEmbedding.objects.filter(user=user).only('combined_embedding').first()
+        if user_embedding is None or not len(user_embedding.combined_vector):
+            return None
+        matches = project_index.search(user_embedding.combined_vector, limit)
+        projects = ProjectSuggestion.objects.defer('embedding').in_bulk(
+            [project_id for project_id, _ in matches]
+        )
+        return [
+            (projects[project_id], similarity)
+            for project_id, similarity in matches if project_id in projects
+        ]
+
+    def embedding_is_current(self, user: User) -> bool:
+        """Whether the stored embedding still matches the user's profile"""
+        texts = profile_texts(user)
+        if not texts[2]:
+            # Nothing to embed; current as long as no leftover embedding exists
+            return not UserEmbedding.objects.filter(user=user).exists()
+        return UserEmbedding.objects.filter(user=user, content_hash=content_hash(texts)).exists()
     
     def calculate_similarity(self, emb1: List[float], emb2: List[float]) -> float:
         """Calculate cosine similarity between two embeddings"""
@@ -126,85 +267,200 @@ class MatchingService:
         
         return dot_product / norm_product
     
+    @instrument('matching.find_matches')
     def find_matches(self, user: User, limit: int = 20) -> List[Dict[str, Any]]:
-        """Find matching users based on skills and interests"""
-        # Get or create user's embedding
-        user_embedding_data = self.create_user_embedding(user)
-        
-        # Get all other users with embeddings
-        other_users = User.objects.exclude(id=user.id).prefetch_related('userembedding')
-        matches = []
-        
-        for other_user in other_users:
-            try:
-                other_embedding = other_user.userembedding
-            except UserEmbedding.DoesNotExist:
-                # Create embedding for user without one
-                self.create_user_embedding(other_user)
-                other_embedding = other_user.userembedding
-            
-            # Calculate similarities
-            skills_sim = self.calculate_similarity(
-                user_embedding_data['skills_embedding'],
-                other_embedding.skills_embedding
-            )
-            
-            interests_sim = self.calculate_similarity(
-                user_embedding_data['interests_embedding'],
-                other_embedding.interests_embedding
-            )
-            
-            combined_sim = self.calculate_similarity(
-                user_embedding_data['combined_embedding'],
-                other_embedding.combined_embedding
-            )
-            
-            # Weighted average (prioritize combined similarity)
-            overall_score = (
-                combined_sim * 0.5 +
-                skills_sim * 0.3 +
-                interests_sim * 0.2
-            )
-            
-            matches.append({
-                'user': other_user,
-                'score': overall_score,
-                'skills_similarity': skills_sim,
-                'interests_similarity': interests_sim,
-                'combined_similarity': combined_sim
-            })
-        
-        # Sort by score and return top matches
-        matches.sort(key=lambda x: x['score'], reverse=True)
-        return matches[:limit]
+        """Find matching users based on skills and interests
+
+        Only users that already have an embedding are candidates; embeddings
+        are never computed here. A requester without one is matched with the
+        cheap skill/interest overlap of find_matches_by_query until it exists.
+        """
+        user_embedding = UserEmbedding.objects.filter(user=user).first()
+        if user_embedding is None:
+            return self.fallback_matches(user, limit)
+
+        # Score every other user in one batched pass over the in-memory index
+        matches = embedding_index.search(
+            user_embedding.skills_vector,
+            user_embedding.interests_vector,
+            user_embedding.combined_vector,
+            limit,
+            exclude_ids=[user.id]
+        )
+
+        users = User.objects.in_bulk([match['user_id'] for match in matches])
+        results = []
+        for match in matches:
+            other_user = users.get(match.pop('user_id'))
+            if other_user is not None:
+                results.append({'user': other_user, **match})
+        return results
+
+    def fallback_matches(self, user: User, limit: int = 20) -> List[Dict[str, Any]]:
+        """Skill/interest overlap matches for a user without an embedding"""
+        matches = self.find_matches_by_query(
+            skills=user.skills, interests=user.interests, limit=limit + 1
+        )
+        return [match for match in matches if match['user'].id != user.id][:limit]
     
+    def availability_batch(self, user: User, user_ids=(), team_id=None) -> Dict[str, Any]:
+        """Availability overlap of a user with many users and/or a team's members
+
+        All candidates are loaded in one query and compared in one vectorized
+        pass. With a team, the slots every member shares are returned too.
+        """
+        from teams.models import TeamMembership
+
+        filters = Q(id__in=list(user_ids))
+        queryset = User.objects.all()
+        if team_id is not None:
+            queryset = queryset.annotate(in_team=Exists(
+                TeamMembership.objects.filter(team_id=team_id, user_id=OuterRef('pk'))
+            ))
+            filters |= Q(in_team=True)
+        else:
+            queryset = queryset.annotate(in_team=Value(False))
+        rows = list(queryset.filter(filters).order_by('id').values_list('id', 'availability_bits', 'in_team'))
+
+        matrix = availability.as_matrix([bits for _, bits, _ in rows])
+        common, combined = availability.overlap_many(user.availability_bits, matrix)
+        ratios = availability.overlap_ratio(common, combined)
+        own_mask = availability.to_int(user.availability_bits)
+        result = {
+            'overlaps': [
+                {
+                    'user_id': other_id,
+                    'overlap_percentage': float(ratios[i]),
+                    'common_times': availability.slot_labels(own_mask & availability.to_int(bits)),
+                }
+                for i, (other_id, bits, _) in enumerate(rows) if other_id != user.id
+            ]
+        }
+        if team_id is not None:
+            members = np.array([in_team for _, _, in_team in rows], dtype=bool)
+            result['team'] = {
+                'team_id': team_id,
+                'member_count': int(members.sum()),
+                'common_times': availability.slot_labels(availability.common_to_all(matrix[members])),
+            }
+        return result
+
+    @instrument('matching.recommend')
+    def recommend(self, user: User, limit: int = 10, weights: Dict[str, float] = None) -> List[Dict[str, Any]]:
+        """Ranked, availability-annotated recommendations for a user
+
+        Two stages: find_matches generates the MATCHING_RERANK_CANDIDATES
+        best candidates by embedding similarity, then every candidate is
+        re-scored in one batched pass as a weighted blend of that similarity,
+        availability overlap, shared event tags and whether they are still
+        without a team (weights from MATCHING_RERANK_WEIGHTS unless given).
+        Users already on a team with the requester are left out.
+        """
+        from teams.models import TeamMembership
+
+        weights = {**settings.MATCHING_RERANK_WEIGHTS, **(weights or {})}
+        candidates = self.find_matches(user, limit=max(limit, settings.MATCHING_RERANK_CANDIDATES))
+        if not candidates:
+            return []
+
+        candidate_ids = [match['user'].id for match in candidates]
+        memberships = TeamMembership.objects.filter(
+            user_id__in=candidate_ids + [user.id]
+        ).values_list('user_id', 'team_id')
+        teams_by_user = {}
+        for member_id, team_id in memberships:
+            teams_by_user.setdefault(member_id, set()).add(team_id)
+        own_teams = teams_by_user.get(user.id, set())
+        candidates = [
+            match for match in candidates
+            if not own_teams & teams_by_user.get(match['user'].id, set())
+        ]
+        if not candidates:
+            return []
+
+        similarity = np.array([match['score'] for match in candidates], dtype=np.float32)
+        common, combined = availability.overlap_many(
+            user.availability_bits,
+            availability.as_matrix([match['user'].availability_bits for match in candidates])
+        )
+        availability_overlap = availability.overlap_ratio(common, combined)
+        own_tags = set(normalize_terms(user.event_tags))
+        event_tag_overlap = np.array([
+            self._jaccard(own_tags, set(normalize_terms(match['user'].event_tags)))
+            for match in candidates
+        ], dtype=np.float32)
+        without_team = np.array([
+            match['user'].id not in teams_by_user for match in candidates
+        ], dtype=np.float32)
+
+        scores = (
+            weights['similarity'] * similarity
+            + weights['availability'] * availability_overlap
+            + weights['event_tags'] * event_tag_overlap
+            + weights['team_status'] * without_team
+        )
+        order = np.argsort(-scores, kind='stable')[:limit]
+
+        own_mask = availability.to_int(user.availability_bits)
+        results = []
+        for i in order:
+            match = candidates[i]
+            results.append({
+                **match,
+                'similarity': match['score'],
+                'score': float(scores[i]),
+                'availability_overlap': float(availability_overlap[i]),
+                'common_times': availability.slot_labels(
+                    own_mask & availability.to_int(match['user'].availability_bits)
+                ),
+                'event_tag_overlap': float(event_tag_overlap[i]),
+                'has_team': not without_team[i],
+            })
+        return results
+
+    @staticmethod
+    def _jaccard(a, b):
+        union = len(a | b)
+        return len(a & b) / union if union else 0.0
+
     def get_availability_overlap(self, user1: User, user2: User) -> Dict[str, float]:
         """Calculate availability overlap between two users"""
-        if not user1.availability or not user2.availability:
+        mask1 = availability.to_int(user1.availability_bits)
+        mask2 = availability.to_int(user2.availability_bits)
+        if not mask1 or not mask2:
             return {'overlap_percentage': 0.0, 'common_times': []}
-        
-        # Simple implementation - in reality this would be more sophisticated
-        user1_available = set()
-        user2_available = set()
-        
-        # Convert availability JSON to sets of time slots
-        for day, times in user1.availability.items():
-            if isinstance(times, list):
-                for time_slot in times:
-                    user1_available.add(f"{day}_{time_slot}")
-        
-        for day, times in user2.availability.items():
-            if isinstance(times, list):
-                for time_slot in times:
-                    user2_available.add(f"{day}_{time_slot}")
-        
-        # Calculate overlap
-        common_times = user1_available.intersection(user2_available)
-        total_slots = len(user1_available.union(user2_available))
-        
-        overlap_percentage = len(common_times) / total_slots if total_slots > 0 else 0
-        
+
+        # Share of the pair's combined slots that both have
+        common = mask1 & mask2
+        return {
+            'overlap_percentage': common.bit_count() / (mask1 | mask2).bit_count(),
+            'common_times': availability.slot_labels(common)
+        }
+
+    @instrument('matching.availability_heatmap')
+    def availability_heatmap(self, event_tag=None, skill=None, team_id=None) -> Dict[str, Any]:
+        """How many active users are free in each day x slot
+
+        Optionally restricted to users with an event tag, a skill and/or on
+        a team; filters combine. Served from the in-memory availability index.
+        """
+        from teams.models import TeamMembership
+
+        user_ids = None
+        if skill:
+            user_ids = term_index.users_with('skills', skill)
+        if team_id is not None:
+            members = set(TeamMembership.objects.filter(team_id=team_id).values_list('user_id', flat=True))
+            user_ids = members if user_ids is None else user_ids & members
+        counts, users = availability_index.histogram(event_tag=event_tag, user_ids=user_ids)
+        grid = counts.reshape(len(availability.DAYS), len(availability.SLOTS))
         return {
-            'overlap_percentage': overlap_percentage,
-            'common_times': list(common_times)
-        }
\ No newline at end of file
+            'users': users,
+            'max_count': int(grid.max()) if users else 0,
+            'days': availability.DAYS,
+            'slots': availability.SLOTS,
+            'counts': {
+                day: dict(zip(availability.SLOTS, grid[i].tolist()))
+                for i, day in enumerate(availability.DAYS)
+            },
+        }
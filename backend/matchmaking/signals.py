@@ -0,0 +1,121 @@
+"""
+Keep derived matching data (in-memory indexes, canonical terms) in sync with the database
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from accounts.models import UserEmbedding, sync_terms
+from teams.models import TeamMembership
+from .models import ProjectSuggestion
+from .result_cache import profile_saved
+from .services import (
+    MatchingService, availability_index, embedding_index, project_index, schedule_embedding,
+    term_index
+)
+from .text import content_hash, project_text
+from .versions import bump_version
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=UserEmbedding)
+def index_user_embedding(sender, instance, **kwargs):
+    transaction.on_commit(lambda: embedding_index.upsert(
+        instance.user_id,
+        instance.skills_vector,
+        instance.interests_vector,
+        instance.combined_vector
+    ))
+
+
+@receiver(post_delete, sender=UserEmbedding)
+def unindex_user_embedding(sender, instance, **kwargs):
+    transaction.on_commit(lambda: embedding_index.remove(instance.user_id))
+
+
+@receiver(post_save, sender=User)
+def reindex_user(sender, instance, created, **kwargs):
+    if created or not instance.has_changed('is_active'):
+        return
+    if not instance.is_active:
+        transaction.on_commit(lambda: embedding_index.remove(instance.id))
+    elif instance.id not in embedding_index:
+        # Reactivated user: bring their existing embedding back into the index
+        # (or, if this process has not built it, tell the processes that have)
+        user_embedding = UserEmbedding.objects.filter(user_id=instance.id).first()
+        if user_embedding is not None:
+            index_user_embedding(UserEmbedding, user_embedding)
+
+
+@receiver(post_save, sender=User)
+def refresh_stale_embedding(sender, instance, update_fields=None, **kwargs):
+    """Re-embed a user only when their skills or interests actually changed"""
+    if update_fields is not None and not {'skills', 'interests'} & set(update_fields):
+        return
+    if not instance.has_changed('skills', 'interests', 'is_active'):
+        return
+    if instance.is_active and not MatchingService().embedding_is_current(instance):
+        schedule_embedding(instance)
+
+
+@receiver(post_save, sender=User)
+def index_user_terms(sender, instance, created, **kwargs):
+    if created or instance.has_changed('skills', 'interests'):
+        skills, interests = instance.skills, instance.interests
+        transaction.on_commit(lambda: term_index.update_user(instance.id, skills, interests))
+
+
+@receiver(post_save, sender=User)
+def count_user_availability(sender, instance, created, **kwargs):
+    if created or instance.has_changed('availability', 'event_tags', 'is_active'):
+        user_id, bits, event_tags, is_active = (
+            instance.id, instance.availability_bits, instance.event_tags, instance.is_active
+        )
+        transaction.on_commit(lambda: availability_index.update_user(user_id, bits, event_tags, is_active))
+
+
+@receiver(post_save, sender=User)
+def expire_user_results(sender, instance, **kwargs):
+    transaction.on_commit(lambda: profile_saved(instance.id))
+
+
+@receiver(post_save, sender=TeamMembership)
+@receiver(post_delete, sender=TeamMembership)
+def expire_team_results(sender, **kwargs):
+    # Recommendations leave out teammates and rank users without a team higher
+    transaction.on_commit(lambda: bump_version('team_memberships'))
+
+
+@receiver(post_delete, sender=User)
+def unindex_user(sender, instance, **kwargs):
+    # Django clears instance.id after the delete, before the callbacks run
+    user_id = instance.id
+    transaction.on_commit(lambda: embedding_index.remove(user_id))
+    transaction.on_commit(lambda: term_index.remove_user(user_id))
+    transaction.on_commit(lambda: availability_index.remove_user(user_id))
+
+
+@receiver(post_save, sender=ProjectSuggestion)
+def sync_project_terms(sender, instance, **kwargs):
+    sync_terms(instance.canonical_skills, instance.required_skills)
+
+
+@receiver(post_save, sender=ProjectSuggestion)
+def index_project(sender, instance, **kwargs):
+    # Projects are embedded in batches by MatchingService.embed_projects; a
+    # new project, or an edit that makes the stored embedding stale, takes
+    # the project out of recommendations until it is re-embedded on commit.
+    # Batches saved in one transaction are embedded before it commits, so
+    # the re-embedding below then finds them current and skips them.
+    if len(instance.embedding) and instance.embedding_hash == content_hash([project_text(instance)]):
+        vector = instance.embedding_vector
+        transaction.on_commit(lambda: project_index.upsert_many([(instance.id, vector)]))
+    else:
+        transaction.on_commit(lambda: project_index.remove(instance.id))
+        transaction.on_commit(lambda: MatchingService().embed_projects([instance]), robust=True)
+
+
+@receiver(post_delete, sender=ProjectSuggestion)
+def unindex_project(sender, instance, **kwargs):
+    transaction.on_commit(lambda: project_index.remove(instance.id))
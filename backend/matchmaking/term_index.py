@@ -0,0 +1,107 @@
+"""
+Inverted index from normalized skill/interest terms to users
+
+Used by skill/interest query matching: a query only touches the postings of
+its own terms, so its cost grows with the number of matching users rather
+than with the size of the user base.
+"""
+import heapq
+from collections import Counter, defaultdict
+from .text import normalize_term, normalize_terms
+from .versions import VersionedIndex
+
+
+class TermIndex(VersionedIndex):
+    """Term -> set of user ids, separately for skills and interests"""
+    version_name = 'term_index'
+
+    def __init__(self):
+        super().__init__()
+        self._postings = {'skills': defaultdict(set), 'interests': defaultdict(set)}
+        self._user_terms = {}
+
+    def __len__(self):
+        return len(self._user_terms)
+
+    def _build(self):
+        from django.contrib.auth import get_user_model
+
+        self._postings = {'skills': defaultdict(set), 'interests': defaultdict(set)}
+        self._user_terms = {}
+        users = get_user_model().objects.values_list('id', 'skills', 'interests')
+        for user_id, skills, interests in users.iterator(chunk_size=2000):
+            self._set(user_id, skills, interests)
+
+    def update_user(self, user_id, skills, interests):
+        """Re-index a user's skills and interests"""
+        self._apply(lambda: self._set(user_id, skills, interests))
+
+    def remove_user(self, user_id):
+        self._apply(lambda: self._unset(user_id))
+
+    def _set(self, user_id, skills, interests):
+        terms = (frozenset(normalize_terms(skills)), frozenset(normalize_terms(interests)))
+        if self._user_terms.get(user_id) == terms:
+            return False
+        self._unset(user_id)
+        if not terms[0] and not terms[1]:
+            return True
+        self._user_terms[user_id] = terms
+        for field, field_terms in zip(('skills', 'interests'), terms):
+            for term in field_terms:
+                self._postings[field][term].add(user_id)
+        return True
+
+    def _unset(self, user_id):
+        terms = self._user_terms.pop(user_id, None)
+        if terms is None:
+            return False
+        for field, field_terms in zip(('skills', 'interests'), terms):
+            postings = self._postings[field]
+            for term in field_terms:
+                postings[term].discard(user_id)
+                if not postings[term]:
+                    del postings[term]
+        return True
+
+    def users_with(self, field, term):
+        """Ids of the users listing `term` under 'skills' or 'interests'"""
+        self.ensure_current()
+        with self._lock:
+            return set(self._postings[field].get(normalize_term(term), ()))
+
+    def search(self, skills=None, interests=None, limit=20):
+        """Best `limit` users by share of the queried terms they have
+
+        Returns (user_id, skills_similarity, interests_similarity, score)
+        tuples, best first; ties go to the lower user id.
+        """
+        self.ensure_current()
+        query = {'skills': normalize_terms(skills), 'interests': normalize_terms(interests)}
+        with self._lock:
+            counts = {}
+            for field, terms in query.items():
+                counts[field] = Counter()
+                postings = self._postings[field]
+                for term in terms:
+                    counts[field].update(postings.get(term, ()))
+
+        skill_terms, interest_terms = len(query['skills']), len(query['interests'])
+        results = []
+        for user_id in counts['skills'].keys() | counts['interests'].keys():
+            skills_similarity = counts['skills'][user_id] / skill_terms if skill_terms else 0.0
+            interests_similarity = counts['interests'][user_id] / interest_terms if interest_terms else 0.0
+            if skill_terms and interest_terms:
+                score = (skills_similarity + interests_similarity) / 2
+            else:
+                score = skills_similarity or interests_similarity
+            results.append((user_id, skills_similarity, interests_similarity, score))
+        return heapq.nsmallest(limit, results, key=lambda result: (-result[3], result[0]))
+
+    def stats(self):
+        return {
+            **super().stats(),
+            'users': len(self),
+            'skill_terms': len(self._postings['skills']),
+            'interest_terms': len(self._postings['interests']),
+        }
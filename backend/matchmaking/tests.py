@@ -0,0 +1,271 @@
+import hashlib
+from unittest import mock
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from accounts.models import UserEmbedding
+from .ann import ExactSearcher, IVFSearcher
+from .embeddings import text_cache
+from .index import EmbeddingIndex
+from .management.commands.evaluate_ann import Command as EvaluateANNCommand
+from .models import EmbeddingJob, ProjectSuggestion
+from .result_cache import ResultCache
+from .services import (
+    MatchingService, availability_index, embedding_index, project_index, term_index
+)
+from .text import content_hash, project_text
+from .term_index import TermIndex
+from .versions import bump_version, check_shared_cache
+from .worker import process_pending_jobs
+
+User = get_user_model()
+
+
+class FakeModel:
+    """Deterministic stand-in for the SentenceTransformer"""
+    dim = 16
+
+    def encode(self, texts, batch_size=64):
+        return np.stack([
+            np.random.default_rng(int(hashlib.sha256(text.encode('utf-8')).hexdigest()[:8], 16))
+            .standard_normal(self.dim).astype(np.float32)
+            for text in texts
+        ])
+
+
+class MatchingTestCase(TestCase):
+    """Embeds with FakeModel and starts from unbuilt shared indexes
+
+    Versions live in the cache table, which is rolled back with each test,
+    so indexes built by an earlier test could otherwise look current.
+    """
+
+    def setUp(self):
+        super().setUp()
+        text_cache.clear()
+        for index in (embedding_index, term_index, project_index, availability_index):
+            index.is_built = False
+        patcher = mock.patch('matchmaking.embeddings.get_model', return_value=FakeModel())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def embed(self, *users):
+        with self.captureOnCommitCallbacks(execute=True):
+            MatchingService().embed_users(users)
+
+
+@override_settings(MATCHING_EMBEDDING_QUEUE=True)
+class SharedVersionTests(MatchingTestCase):
+    def test_web_index_notices_embeddings_from_worker(self):
+        user = User.objects.create(username='ada', skills=['Python'], interests=['Robotics'])
+        web_index = EmbeddingIndex().ensure_current()
+        self.assertNotIn(user.id, web_index)
+
+        # The worker process opens its own connection to the shared cache
+        worker_cache = caches.create_connection('default')
+        with mock.patch('matchmaking.versions.cache', worker_cache):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(process_pending_jobs(), 1)
+
+        self.assertTrue(web_index.is_stale())
+        self.assertIn(user.id, web_index.ensure_current())
+        # Caught up from the logged user ids, without a rebuild
+        self.assertEqual((web_index.rebuild_count, web_index.catch_ups), (1, 1))
+
+    def test_unlogged_change_rebuilds(self):
+        user = User.objects.create(username='ada', skills=['Python'], interests=['Robotics'])
+        web_index = EmbeddingIndex().ensure_current()
+        self.embed(user)
+        bump_version(web_index.version_name)
+        self.assertIn(user.id, web_index.ensure_current())
+        self.assertEqual((web_index.rebuild_count, web_index.catch_ups), (2, 0))
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_queue_refuses_process_local_cache(self):
+        with self.assertRaises(ImproperlyConfigured):
+            check_shared_cache()
+
+    @override_settings(
+        MATCHING_EMBEDDING_QUEUE=False,
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    )
+    def test_process_local_cache_without_queue(self):
+        check_shared_cache()
+
+
+class FailingModel(FakeModel):
+    def encode(self, texts, batch_size=64):
+        if any('poison' in text for text in texts):
+            raise RuntimeError('cannot encode')
+        return super().encode(texts, batch_size)
+
+
+@override_settings(MATCHING_EMBEDDING_QUEUE=True)
+class EmbeddingWorkerTests(MatchingTestCase):
+    def test_failing_job_does_not_fail_its_batch(self):
+        users = [
+            User.objects.create(username=f'user{i}', skills=['Python'], interests=[f'topic {i}'])
+            for i in range(3)
+        ]
+        bad = User.objects.create(username='bad', skills=['poison'], interests=['Robotics'])
+        with mock.patch('matchmaking.embeddings.get_model', return_value=FailingModel()):
+            self.assertEqual(process_pending_jobs(), 3)
+
+        self.assertEqual(
+            set(UserEmbedding.objects.values_list('user_id', flat=True)), {user.id for user in users}
+        )
+        job = EmbeddingJob.objects.get()
+        self.assertEqual((job.user_id, job.attempts), (bad.id, 1))
+        self.assertIn('cannot encode', job.last_error)
+
+
+class EmptyIndexTests(MatchingTestCase):
+    def test_search_without_rows(self):
+        user = User.objects.create(username='ada', skills=['Python'], interests=['Robotics'], is_active=False)
+        MatchingService().embed_users([user])
+        index = EmbeddingIndex().ensure_current()
+        self.assertEqual(len(index), 0)
+        vector = np.ones(FakeModel.dim, dtype=np.float32)
+        self.assertEqual(index.search(vector, vector, vector, 10, exclude_ids=[user.id]), [])
+
+    def test_recommendations_when_no_active_user_is_embedded(self):
+        user = User.objects.create(username='ada', skills=['Python'], interests=['Robotics'], is_active=False)
+        MatchingService().embed_users([user])
+        self.assertEqual(MatchingService().find_matches(user), [])
+        self.assertEqual(MatchingService().recommend(user), [])
+
+
+class UserIndexSignalTests(MatchingTestCase):
+    def test_deleted_user_leaves_every_index(self):
+        user = User.objects.create(username='ada', skills=['Python'], interests=['Robotics'], event_tags=['HackMIT'])
+        self.embed(user)
+        for index in (embedding_index, term_index, availability_index):
+            index.ensure_current()
+        user_id = user.id
+        self.assertIn(user_id, embedding_index)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.delete()
+        self.assertNotIn(user_id, embedding_index)
+        self.assertEqual(term_index.users_with('skills', 'Python'), set())
+        self.assertEqual(availability_index.stats()['users'], 0)
+
+    def test_reactivation_reaches_other_processes(self):
+        user = User.objects.create(username='ada', skills=['Python'], interests=['Robotics'])
+        self.embed(user)
+        user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        other_index = EmbeddingIndex().ensure_current()
+        self.assertNotIn(user.id, other_index)
+
+        # This process never built its index
+        embedding_index.is_built = False
+        user.is_active = True
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+        self.assertIn(user.id, other_index.ensure_current())
+        self.assertEqual(other_index.catch_ups, 1)
+
+
+class ProjectEmbeddingTests(MatchingTestCase):
+    def ranked_project_ids(self, user):
+        return [project.id for project, _ in MatchingService().recommend_projects(user)]
+
+    def test_edited_project_returns_to_ranking(self):
+        user = User.objects.create(username='ada', skills=['Python'], interests=['Robotics'])
+        self.embed(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            project = ProjectSuggestion.objects.create(
+                title='Line follower', description='A small robot that follows a line.',
+                required_skills=['Python'], tech_stack=['Raspberry Pi']
+            )
+        self.assertIn(project.id, self.ranked_project_ids(user))
+
+        project.description = 'A small robot that maps a maze.'
+        with self.captureOnCommitCallbacks(execute=True):
+            project.save()
+
+        project.refresh_from_db()
+        self.assertEqual(project.embedding_hash, content_hash([project_text(project)]))
+        self.assertIn(project.id, self.ranked_project_ids(user))
+
+    def test_sample_projects_are_encoded_in_one_batch(self):
+        model = FakeModel()
+        with mock.patch('matchmaking.embeddings.get_model', return_value=model), \
+                mock.patch.object(model, 'encode', wraps=model.encode) as encode:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post('/api/matchmaking/populate-projects/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(encode.call_count, 1)
+        self.assertFalse(ProjectSuggestion.objects.filter(embedding_hash='').exists())
+
+
+class IVFSearcherTests(TestCase):
+    def test_recall_against_exact_search(self):
+        rng = np.random.default_rng(0)
+        matrix = EvaluateANNCommand.synthetic_matrix(rng, 2000, 32)
+        ivf, exact = IVFSearcher(nprobe=8), ExactSearcher()
+        ivf.build(matrix)
+
+        k = 10
+        weights = np.repeat([0.5, 0.3, 0.2], matrix.dim).astype(np.float32)
+        queries = rng.choice(len(matrix), 100, replace=False)
+        hits = sum(
+            len(np.intersect1d(exact.candidates(matrix, query, k), ivf.candidates(matrix, query, k)))
+            for query in (matrix.rows[row] * weights for row in queries)
+        )
+        self.assertGreaterEqual(hits / (k * len(queries)), 0.9)
+
+
+class VersionedIndexTests(MatchingTestCase):
+    def test_change_from_another_process_is_not_adopted(self):
+        ada = User.objects.create(username='ada', skills=['Python'])
+        index = TermIndex().ensure_current()
+
+        # Another process indexes a new user and bumps the version while
+        # this process applies a change of its own
+        grace = User.objects.create(username='grace', skills=['Python'])
+        apply_change = index._set
+
+        def racing_set(*args):
+            bump_version(index.version_name)
+            return apply_change(*args)
+
+        with mock.patch.object(index, '_set', racing_set):
+            index.update_user(ada.id, ['Python', 'Go'], [])
+
+        self.assertTrue(index.is_stale())
+        found = {user_id for user_id, *_ in index.search(skills=['Python'])}
+        self.assertEqual(found, {ada.id, grace.id})
+
+    def test_own_change_is_adopted(self):
+        ada = User.objects.create(username='ada', skills=['Python'])
+        index = TermIndex().ensure_current()
+        index.update_user(ada.id, ['Python', 'Go'], [])
+        self.assertFalse(index.is_stale())
+
+
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'test_result_cache'
+}})
+class ResultCacheTests(TestCase):
+    def setUp(self):
+        call_command('createcachetable', verbosity=0)
+
+    def test_hit_reads_versions_in_one_query(self):
+        results = ResultCache(ttl=60)
+        versions = ('embedding_index', 'term_index', 'availability_index', 'profile:1')
+        results.get_or_compute('recommendations', (1, 10), versions, lambda: ['computed'])
+        # versions, entry
+        with self.assertNumQueries(2):
+            value = results.get_or_compute('recommendations', (1, 10), versions, lambda: ['recomputed'])
+        self.assertEqual(value, ['computed'])
+
+    def test_bump_makes_entries_unreachable(self):
+        results = ResultCache(ttl=60)
+        results.get_or_compute('query', ('python',), ('term_index',), lambda: ['old'])
+        bump_version('term_index')
+        self.assertEqual(results.get_or_compute('query', ('python',), ('term_index',), lambda: ['new']), ['new'])
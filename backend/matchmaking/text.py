@@ -0,0 +1,34 @@
+"""
+Normalization of skill and interest lists for matching
+"""
+import hashlib
+
+
+def normalize_term(value):
+    """Case-folded term with collapsed whitespace"""
+    return ' '.join(str(value).split()).casefold()
+
+
+def normalize_terms(values):
+    """Distinct normalized terms, sorted so that list order does not matter"""
+    return sorted({term for term in map(normalize_term, values or []) if term})
+
+
+def profile_texts(user):
+    """Skills, interests and combined texts that are embedded for a user"""
+    skills_text = ' '.join(normalize_terms(user.skills))
+    interests_text = ' '.join(normalize_terms(user.interests))
+    combined_text = f"{skills_text} {interests_text}".strip()
+    return skills_text, interests_text, combined_text
+
+
+def project_text(project):
+    """Text embedded for a project suggestion"""
+    skills = ', '.join(normalize_terms(project.required_skills))
+    tech_stack = ', '.join(normalize_terms(project.tech_stack))
+    return f"{project.title}. {project.description} Skills: {skills}. Tech stack: {tech_stack}."
+
+
+def content_hash(texts):
+    """Stable fingerprint of the texts an embedding was computed from"""
+    return hashlib.sha256('\n'.join(texts).encode('utf-8')).hexdigest()
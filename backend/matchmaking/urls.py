@@ -1,15 +1,24 @@
 from django.urls import path
 from .views import (
-    FindMatchesView, get_availability_overlap, ProjectSuggestionsView,
-    refresh_user_embedding, populate_sample_projects
-    , get_recommendations
+    FindMatchesView, get_availability_overlap, batch_availability_overlap, ProjectSuggestionsView,
+    refresh_user_embedding, populate_sample_projects, recommended_projects
+    , get_recommendations, index_stats,
+    text_cache_stats, term_index_stats, availability_heatmap, availability_index_stats, result_cache_stats
 )
 
 urlpatterns = [
     path('find/', FindMatchesView.as_view(), name='find-matches'),
     path('availability/<int:user_id>/', get_availability_overlap, name='availability-overlap'),
+    path('availability/batch/', batch_availability_overlap, name='availability-batch'),
+    path('availability/heatmap/', availability_heatmap, name='availability-heatmap'),
+    path('availability/stats/', availability_index_stats, name='availability-index-stats'),
     path('projects/', ProjectSuggestionsView.as_view(), name='project-suggestions'),
+    path('projects/recommended/', recommended_projects, name='recommended-projects'),
     path('refresh-embedding/', refresh_user_embedding, name='refresh-embedding'),
     path('populate-projects/', populate_sample_projects, name='populate-projects'),
     path('recommendations/', get_recommendations, name='recommendations'),
+    path('index/stats/', index_stats, name='index-stats'),
+    path('text-cache/stats/', text_cache_stats, name='text-cache-stats'),
+    path('terms/stats/', term_index_stats, name='term-index-stats'),
+    path('results/stats/', result_cache_stats, name='result-cache-stats'),
 ]
\ No newline at end of file
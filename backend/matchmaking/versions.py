@@ -0,0 +1,189 @@
+"""
+Version counters shared between worker processes through Django's cache
+
+A bump can also log the ids it changed, so other processes catch up by
+reloading just those rows instead of rebuilding from scratch.
+"""
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+
+KEY_PREFIX = 'matchmaking:version:'
+CHANGES_PREFIX = 'matchmaking:changes:'
+# A copy further behind than this rebuilds instead of replaying the log
+MAX_CATCH_UP_VERSIONS = 100
+MAX_CATCH_UP_IDS = 2000
+
+
+def get_version(name):
+    """Current version of a shared structure (0 if it was never bumped)"""
+    return cache.get(KEY_PREFIX + name, 0)
+
+
+def get_versions(names):
+    """Current versions of several shared structures, read in one cache call"""
+    found = cache.get_many([KEY_PREFIX + name for name in names])
+    return [found.get(KEY_PREFIX + name, 0) for name in names]
+
+
+def changes_key(name, version):
+    return f'{CHANGES_PREFIX}{name}:{version}'
+
+
+def bump_version(name, changed=None):
+    """Increment a shared version and return the new value
+
+    `changed` (ids of the rows the change touched) is logged under the new
+    version for catch_up; without it other processes have to rebuild.
+    """
+    key = KEY_PREFIX + name
+    try:
+        version = cache.incr(key)
+    except ValueError:
+        # Key missing or evicted; start a new sequence
+        cache.add(key, 0, timeout=None)
+        version = cache.incr(key)
+    if changed is not None:
+        # Entries only matter until lagging copies reach max age and rebuild
+        cache.set(
+            changes_key(name, version), sorted(changed),
+            timeout=settings.MATCHING_INDEX_MAX_AGE or 3600
+        )
+    return version
+
+
+def check_shared_cache():
+    """Refuse a process-local default cache when the embedding worker is used
+
+    The worker runs in its own process; with LocMemCache its version bumps
+    would never reach the web processes, which would then serve stale
+    indexes (and cached results) until MATCHING_INDEX_MAX_AGE.
+    """
+    if settings.MATCHING_EMBEDDING_QUEUE and isinstance(caches['default'], LocMemCache):
+        raise ImproperlyConfigured(
+            'MATCHING_EMBEDDING_QUEUE requires a default cache shared between processes '
+            '(database, memcached or redis), not LocMemCache'
+        )
+
+
+class VersionedIndex:
+    """Base for per-process in-memory structures derived from the database
+
+    Subclasses implement _build() (full rebuild from the database) and patch
+    themselves incrementally through _apply(). Every incremental change bumps
+    the shared version named by `version_name`. A process whose copy is
+    behind replays the logged changes through _reload() when the subclass
+    supports it and every one of them was logged; otherwise, or when its
+    copy is older than MATCHING_INDEX_MAX_AGE seconds, it rebuilds.
+    """
+    version_name = None
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.is_built = False
+        self.version = None
+        self.built_at = None
+        self.rebuild_count = 0
+        self.last_rebuild_seconds = 0.0
+        self.total_rebuild_seconds = 0.0
+        self.incremental_updates = 0
+        self.catch_ups = 0
+
+    def _build(self):
+        raise NotImplementedError
+
+    def _reload(self, ids):
+        """Reload the rows with these ids from the database (called under the
+        lock); return False if this index cannot, to rebuild instead"""
+        return False
+
+    def is_expired(self):
+        max_age = settings.MATCHING_INDEX_MAX_AGE
+        return bool(max_age) and time.monotonic() - self.built_at > max_age
+
+    def is_stale(self):
+        if not self.is_built:
+            return True
+        return self.version != get_version(self.version_name) or self.is_expired()
+
+    def ensure_current(self):
+        """Rebuild if never built or too old; catch up with (or, failing
+        that, rebuild after) changes made by other processes"""
+        if not self.is_built or self.is_expired():
+            self.rebuild()
+            return self
+        shared_version = get_version(self.version_name)
+        if shared_version != self.version and not self.catch_up(shared_version):
+            self.rebuild()
+        return self
+
+    def catch_up(self, shared_version):
+        """Replay the logged changes up to `shared_version`; False if any is
+        missing or there are too many"""
+        with self._lock:
+            if self.version == shared_version:
+                return True
+            if not self.version < shared_version <= self.version + MAX_CATCH_UP_VERSIONS:
+                return False
+            keys = [
+                changes_key(self.version_name, version)
+                for version in range(self.version + 1, shared_version + 1)
+            ]
+            logged = cache.get_many(keys)
+            if len(logged) != len(keys):
+                return False
+            ids = set().union(*logged.values())
+            if len(ids) > MAX_CATCH_UP_IDS or not self._reload(ids):
+                return False
+            self.version = shared_version
+            self.catch_ups += 1
+            return True
+
+    def rebuild(self):
+        with self._lock:
+            started = time.perf_counter()
+            version = get_version(self.version_name)
+            self._build()
+            self.is_built = True
+            self.version = version
+            self.built_at = time.monotonic()
+            self.last_rebuild_seconds = time.perf_counter() - started
+            self.total_rebuild_seconds += self.last_rebuild_seconds
+            self.rebuild_count += 1
+
+    def _apply(self, change, changed=None):
+        """Run `change()` (which returns whether anything changed) under the
+        lock and publish a new shared version if it did, logging the ids in
+        `changed` when given"""
+        with self._lock:
+            if not self.is_built:
+                # Nothing local to patch; just tell the other processes
+                bump_version(self.version_name, changed)
+                return
+            if not change():
+                return
+            self.incremental_updates += 1
+            version = bump_version(self.version_name, changed)
+            # Only our own bump may be adopted; if another process bumped in
+            # between, its change is missing here and the copy stays stale
+            if version == self.version + 1:
+                self.version = version
+
+    def stats(self):
+        shared_version = get_version(self.version_name)
+        return {
+            'built': self.is_built,
+            'version': self.version,
+            'shared_version': shared_version,
+            'versions_behind': max(0, shared_version - self.version) if self.is_built else None,
+            'stale': self.is_stale(),
+            'age_seconds': time.monotonic() - self.built_at if self.built_at else None,
+            'rebuild_count': self.rebuild_count,
+            'last_rebuild_seconds': self.last_rebuild_seconds,
+            'total_rebuild_seconds': self.total_rebuild_seconds,
+            'incremental_updates': self.incremental_updates,
+            'catch_ups': self.catch_ups,
+        }
@@ -1,12 +1,20 @@
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from accounts.resolver import firebase_user
 from django.shortcuts import get_object_or_404
-from .services import MatchingService
+from .embeddings import is_model_loaded, text_cache
+from .rendering import render_query_matches, render_recommendations
+from .result_cache import result_cache
+from .services import (
+    MatchingService, availability_index, embedding_index, schedule_embedding, term_index
+)
 from .models import MatchingSession, ProjectSuggestion
 from .serializers import (
-    MatchResultSerializer, AvailabilityOverlapSerializer,
+    AvailabilityOverlapSerializer, AvailabilityBatchSerializer,
     MatchingQuerySerializer, ProjectSuggestionSerializer
 )
 
@@ -23,7 +31,6 @@ class FindMatchesView(generics.GenericAPIView):
     
     def post(self, request):
         serializer = self.get_serializer(data=request.data)
-        print(request.data)
         if serializer.is_valid():
             matching_service = MatchingService()
 
@@ -32,9 +39,12 @@ class FindMatchesView(generics.GenericAPIView):
             interests = serializer.validated_data.get('interests', [])
             limit = serializer.validated_data['limit']
 
-            # Find matches based on provided skills/interests
-            matches = matching_service.find_matches_by_query(skills=skills, interests=interests, limit=limit)
-            print('Found matches:', matches)
+            # Identical queries are answered from the result cache until the
+            # term index changes
+            results = result_cache.query_matches(
+                skills, interests, limit,
+                lambda: self.render_matches(matching_service, skills, interests, limit)
+            )
 
             # Log matching session only if user field is nullable, otherwise skip logging for anonymous search
             from matchmaking.models import MatchingSession
@@ -44,67 +54,96 @@ class FindMatchesView(generics.GenericAPIView):
                     user=None,
                     query_skills=skills,
                     query_interests=interests,
-                    results_count=len(matches)
+                    results_count=len(results)
                 )
-
-            # Serialize results: ensure we return user data for frontend
-            # If matches are user objects, get similarity scores from MatchingService
-            # If matches are dicts with scores, pass through
-            results = []
-            for match in matches:
-                if isinstance(match, dict) and 'user' in match:
-                    from accounts.serializers import UserSerializer
-                    user_info = UserSerializer(match['user']).data
-                    # Convert similarity scores to percentage
-                    skills_sim = match.get('skills_similarity', 0.0)
-                    interests_sim = match.get('interests_similarity', 0.0)
-                    combined_sim = match.get('combined_similarity', 0.0)
-                    score = match.get('score', 0.0)
-                    def clamp(val):
-                        # Always round to nearest integer, then clamp to 0-100
-                        return max(0, min(100, int(round(val * 100))))
-                    results.append({
-                        **user_info,
-                        'skills_similarity': clamp(skills_sim),
-                        'interests_similarity': clamp(interests_sim),
-                        'combined_similarity': clamp(combined_sim),
-                        'score': clamp(score)
-                    })
-                else:
-                    # If just user object, serialize
-                    from accounts.serializers import UserSerializer
-                    user_info = UserSerializer(match).data
-                    results.append({
-                        **user_info,
-                        'skills_similarity': 0,
-                        'interests_similarity': 0,
-                        'combined_similarity': 0,
-                        'score': 0
-                    })
-            print('Match results:', results)
             return Response(results)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    def render_matches(self, matching_service, skills, interests, limit):
+        return render_query_matches(
+            matching_service.score_query(skills=skills, interests=interests, limit=limit)
+        )
 
 
 # --- Hugging Face Recommendations Endpoint ---
 @api_view(["GET"])
 def get_recommendations(request):
-    """Return recommended users for a given Firebase UID using embedding similarity."""
+    """Return recommended users for a given Firebase UID.
+
+    Ranked by embedding similarity re-weighted with availability overlap,
+    shared event tags and team status, and annotated with those features.
+    """
     firebase_uid = request.GET.get("uid")
     if not firebase_uid:
         return Response({"error": "Missing uid parameter"}, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        user = User.objects.get(firebase_uid=firebase_uid)
-    except User.DoesNotExist:
+    user = firebase_user(request, param="uid")
+    if user is None:
         return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
 
+    def render():
+        matches = MatchingService().recommend(user, limit=10)
+        return render_recommendations(matches)
+
+    return Response(result_cache.recommendations(user, 10, render))
+
+
+@api_view(['GET'])
+@permission_classes([])
+def index_stats(request):
+    """Size, freshness and rebuild cost of this process's embedding index,
+    and whether this process has loaded the model"""
+    return Response({**embedding_index.stats(), 'model_loaded': is_model_loaded()})
+
+
+@api_view(['GET'])
+@permission_classes([])
+def text_cache_stats(request):
+    """Hit rates of this process's text embedding cache"""
+    return Response(text_cache.stats())
+
+
+@api_view(['GET'])
+@permission_classes([])
+def result_cache_stats(request):
+    """Hits, misses and latency saved by this process's result cache"""
+    return Response(result_cache.stats())
+
+
+@api_view(['GET'])
+@permission_classes([])
+def term_index_stats(request):
+    """Size and freshness of this process's skill/interest term index"""
+    return Response(term_index.stats())
+
+
+@api_view(['GET'])
+@permission_classes([])
+def availability_index_stats(request):
+    """Size and freshness of this process's availability heatmap index"""
+    return Response(availability_index.stats())
+
+
+@api_view(['GET'])
+@permission_classes([])
+def availability_heatmap(request):
+    """Number of users free in each day x slot (public)
+
+    Optional filters: ?event_tag=, ?skill= and ?team_id=, which combine.
+    """
+    team_id = request.query_params.get('team_id')
+    if team_id:
+        try:
+            team_id = int(team_id)
+        except ValueError:
+            return Response({'error': 'team_id must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
     matching_service = MatchingService()
-    matches = matching_service.find_matches(user, limit=10)
-    serializer = MatchResultSerializer(matches, many=True)
-    return Response(serializer.data)
+    return Response(matching_service.availability_heatmap(
+        event_tag=request.query_params.get('event_tag') or None,
+        skill=request.query_params.get('skill') or None,
+        team_id=team_id or None,
+    ))
 
 
 @api_view(['GET'])
@@ -129,49 +168,92 @@ def get_availability_overlap(request, user_id):
     return Response(serializer.data)
 
 
+@api_view(['POST'])
+@permission_classes([])
+def batch_availability_overlap(request):
+    """Availability overlap of the requester with many users or a whole team
+
+    The requester is the logged-in user or the one named by firebase_uid.
+    """
+    serializer = AvailabilityBatchSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = serializer.validated_data
+
+    if data.get('firebase_uid'):
+        user = firebase_user(request)
+    else:
+        user = request.user if request.user.is_authenticated else None
+    if user is None:
+        return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    matching_service = MatchingService()
+    return Response(matching_service.availability_batch(
+        user, user_ids=data.get('user_ids', []), team_id=data.get('team_id')
+    ))
+
+
+class ProjectSuggestionsPagination(PageNumberPagination):
+    page_size = 10
+
+
 class ProjectSuggestionsView(generics.ListAPIView):
     """Get project suggestions based on user skills (public)"""
     serializer_class = ProjectSuggestionSerializer
     permission_classes = []
+    pagination_class = ProjectSuggestionsPagination
 
     def get_queryset(self):
-        user_skills = set()
-        # Try to get firebase_uid from request
-        firebase_uid = self.request.data.get('firebase_uid') or self.request.query_params.get('firebase_uid')
-        if firebase_uid:
-            user = User.objects.filter(firebase_uid=firebase_uid).first()
-            if user and user.skills:
-                user_skills = set(user.skills)
-
-        if not user_skills:
+        user = firebase_user(self.request)
+
+        if user is None or not user.skills:
             # Return general suggestions if user has no skills
-            return ProjectSuggestion.objects.all()[:10]
+            return ProjectSuggestion.objects.order_by('id')
 
-        # Find projects that match user skills
-        matching_projects = []
-        for project in ProjectSuggestion.objects.all():
-            project_skills = set(project.required_skills)
-            skill_overlap = len(user_skills.intersection(project_skills))
+        return MatchingService().projects_by_skill_overlap(user)
 
-            if skill_overlap > 0:
-                matching_projects.append((project, skill_overlap))
 
-        # Sort by skill overlap
-        matching_projects.sort(key=lambda x: x[1], reverse=True)
-        return [project for project, _ in matching_projects[:10]]
+@api_view(['GET'])
+@permission_classes([])
+def recommended_projects(request):
+    """Projects ranked by embedding similarity to the user's profile (public)
+
+    Users without an embedding yet get the skill overlap ranking instead.
+    """
+    firebase_uid = request.query_params.get('firebase_uid')
+    if not firebase_uid:
+        return Response({'error': 'Missing firebase_uid parameter'}, status=status.HTTP_400_BAD_REQUEST)
+    user = firebase_user(request)
+    if user is None:
+        return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        limit = max(1, min(50, int(request.query_params.get('limit', 10))))
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    matching_service = MatchingService()
+    matches = matching_service.recommend_projects(user, limit=limit)
+    if matches is None:
+        projects = list(matching_service.projects_by_skill_overlap(user).defer('embedding')[:limit])
+    else:
+        projects = []
+        for project, similarity in matches:
+            project.similarity = similarity
+            projects.append(project)
+    return Response(ProjectSuggestionSerializer(projects, many=True).data)
 
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def refresh_user_embedding(request):
-    """Refresh user's AI embedding"""
-    matching_service = MatchingService()
-    embedding_data = matching_service.create_user_embedding(request.user)
+    """Queue a refresh of the user's AI embedding"""
+    schedule_embedding(request.user, force=True)
     
     return Response({
-        'message': 'User embedding refreshed successfully',
-        'embedding_created': True
-    })
+        'message': 'User embedding refresh queued',
+        'embedding_created': False,
+        'queued': True
+    }, status=status.HTTP_202_ACCEPTED)
 
 
 # Mock data for project suggestions - in reality this would come from AI or database
@@ -224,13 +306,21 @@ SAMPLE_PROJECTS = [
 def populate_sample_projects(request):
     """Populate database with sample project suggestions (dev only, public)"""
     created_count = 0
-    for project_data in SAMPLE_PROJECTS:
-        project, created = ProjectSuggestion.objects.get_or_create(
-            title=project_data['title'],
-            defaults=project_data
-        )
-        if created:
-            created_count += 1
+    created_projects = []
+    with transaction.atomic():
+        for project_data in SAMPLE_PROJECTS:
+            project, created = ProjectSuggestion.objects.get_or_create(
+                title=project_data['title'],
+                defaults=project_data
+            )
+            if created:
+                created_count += 1
+                created_projects.append(project)
+
+        # Embed the new projects in one batch, before the save signals'
+        # per-project re-embedding runs on commit
+        if created_projects:
+            MatchingService().embed_projects(created_projects)
 
     return Response({
         'message': f'{created_count} sample projects created',
@@ -0,0 +1,52 @@
+"""
+Background processing of queued embedding jobs
+"""
+import logging
+from functools import reduce
+from operator import or_
+from django.db.models import F, Q
+from .models import EmbeddingJob
+from .services import MatchingService
+
+logger = logging.getLogger(__name__)
+
+# Jobs that failed this many times are left in the table for inspection
+MAX_ATTEMPTS = 5
+
+
+def process_pending_jobs(limit=256, batch_size=64):
+    """Embed the users of up to `limit` queued jobs; returns the number of jobs embedded"""
+    jobs = list(
+        EmbeddingJob.objects.filter(attempts__lt=MAX_ATTEMPTS)
+        .select_related('user')
+        .order_by('requested_at')[:limit]
+    )
+    if not jobs:
+        return 0
+    return embed_jobs(jobs, batch_size)
+
+
+def embed_jobs(jobs, batch_size=64):
+    """Embed the users of `jobs` in one batch and delete the jobs
+
+    If the batch fails it is split in halves and each is retried, so only
+    the jobs that fail on their own are charged an attempt.
+    """
+    service = MatchingService()
+    try:
+        service.embed_users([job.user for job in jobs if not job.force], batch_size=batch_size)
+        service.embed_users([job.user for job in jobs if job.force], force=True, batch_size=batch_size)
+    except Exception as e:
+        if len(jobs) > 1:
+            middle = len(jobs) // 2
+            return embed_jobs(jobs[:middle], batch_size) + embed_jobs(jobs[middle:], batch_size)
+        logger.exception('Embedding job for user %d failed', jobs[0].user_id)
+        EmbeddingJob.objects.filter(id=jobs[0].id).update(attempts=F('attempts') + 1, last_error=str(e))
+        return 0
+
+    # A job re-requested while we were encoding keeps its newer timestamp and
+    # stays queued, so the latest profile gets embedded on the next pass
+    EmbeddingJob.objects.filter(
+        reduce(or_, (Q(id=job.id, requested_at=job.requested_at) for job in jobs))
+    ).delete()
+    return len(jobs)
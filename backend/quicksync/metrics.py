@@ -0,0 +1,248 @@
+"""
+In-process request metrics and structured request logs
+
+Counters and histograms live in this worker process only and are rendered
+in the Prometheus text format by metrics_view; scrape every worker (or run
+one) to see them all. RequestMetricsMiddleware records per-endpoint latency
+and database usage, `instrument`/`track` time any other code, and
+collectors registered with `registry.collector` report values that are
+already counted elsewhere (e.g. cache hit counters) at scrape time.
+"""
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from django.db import connection
+from django.http import HttpResponse
+
+PREFIX = 'quicksync_'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+request_logger = logging.getLogger('quicksync.requests')
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, series in self._series.items():
+                for bound, count in zip(self.buckets, series['buckets']):
+                    samples.append((f'{self.name}_bucket', key + (('le', repr(bound)),), count))
+                samples.append((f'{self.name}_bucket', key + (('le', '+Inf'),), series['count']))
+                samples.append((f'{self.name}_sum', key, series['sum']))
+                samples.append((f'{self.name}_count', key, series['count']))
+        return samples
+
+
+class Registry:
+    """Named metrics of this process plus scrape-time collectors
+
+    A collector is a callable returning (name, type, help, labels, value)
+    tuples for values that are counted somewhere else.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, **kwargs):
+        name = PREFIX + name
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, **kwargs)
+            return metric
+
+    def counter(self, name, help_text=''):
+        return self._get(Counter, name, help_text)
+
+    def histogram(self, name, help_text='', buckets=LATENCY_BUCKETS):
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def collector(self, func):
+        """Register `func` (usable as a decorator)"""
+        self._collectors.append(func)
+        return func
+
+    def render(self):
+        families = {}
+        for metric in list(self._metrics.values()):
+            families[metric.name] = [metric.type, metric.help, metric.samples()]
+        for collect in self._collectors:
+            for name, metric_type, help_text, labels, value in collect():
+                name = PREFIX + name
+                family = families.setdefault(name, [metric_type, help_text, []])
+                family[1] = family[1] or help_text
+                family[2].append((name, _label_key(labels), value))
+
+        lines = []
+        for name, (metric_type, help_text, samples) in families.items():
+            if help_text:
+                lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for sample_name, labels, value in samples:
+                lines.append(f'{sample_name}{_format_labels(labels)} {float(value):g}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+request_duration = registry.histogram('http_request_duration_seconds', 'Request latency by endpoint')
+requests_total = registry.counter('http_requests_total', 'Requests by endpoint and status')
+db_queries = registry.counter('db_queries_total', 'Database queries run while serving requests')
+db_seconds = registry.counter('db_query_seconds_total', 'Time spent in database queries while serving requests')
+function_duration = registry.histogram('function_duration_seconds', 'Latency of instrumented functions')
+
+
+@contextmanager
+def track(name, histogram=function_duration, **labels):
+    """Time the enclosed block into `histogram`, labelled function=`name`"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - started, function=name, **labels)
+
+
+def instrument(name=None, histogram=function_duration):
+    """Decorator timing every call of a function (see track)"""
+    def decorate(func):
+        label = name or f'{func.__module__}.{func.__qualname__}'
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with track(label, histogram=histogram):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class QueryStats:
+    """connection.execute_wrapper hook counting queries and their time"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+class RequestMetricsMiddleware:
+    """Record latency and database usage per endpoint and log each request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryStats()
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        seconds = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        endpoint = match.view_name if match is not None else 'unmatched'
+        request_duration.observe(seconds, endpoint=endpoint, method=request.method)
+        requests_total.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+        db_queries.inc(queries.count, endpoint=endpoint)
+        db_seconds.inc(queries.seconds, endpoint=endpoint)
+        request_logger.info('request', extra={
+            'endpoint': endpoint,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(1000 * seconds, 2),
+            'db_queries': queries.count,
+            'db_ms': round(1000 * queries.seconds, 2),
+        })
+        return response
+
+
+def metrics_view(request):
+    """This process's metrics in the Prometheus text exposition format"""
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including any `extra` fields"""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
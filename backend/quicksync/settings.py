@@ -32,6 +32,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings and query counts cover every other middleware
+    'quicksync.metrics.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -70,6 +72,51 @@ DATABASES = {
     }
 }
 
+# Cache for matching results (MATCHING_RESULT_CACHE_TTL), also used to share
+# version counters of the in-memory matching structures between processes.
+# It is local memory by default. The embedding worker runs in its own
+# process, so with MATCHING_EMBEDDING_QUEUE enabled (as in the Docker image)
+# the default is the database cache (create its table with `manage.py
+# createcachetable`) and a process-local LocMemCache is refused at startup.
+# Memcached or redis work as well.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default=(
+            'django.core.cache.backends.db.DatabaseCache'
+            if config('MATCHING_EMBEDDING_QUEUE', default=False, cast=bool)
+            else 'django.core.cache.backends.locmem.LocMemCache'
+        )),
+        'LOCATION': config('CACHE_LOCATION', default='quicksync_cache'),
+    }
+}
+
+# Structured (one JSON object per line) logs on stderr; every request is
+# logged by quicksync.metrics.RequestMetricsMiddleware on 'quicksync.requests'
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'quicksync.metrics.JsonFormatter'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'json'},
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': config('LOG_LEVEL', default='INFO'),
+    },
+    'loggers': {
+        'django': {
+            'handlers': ['console'],
+            'level': config('DJANGO_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+        'quicksync.requests': {
+            'level': config('REQUEST_LOG_LEVEL', default='INFO'),
+        },
+    },
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -127,5 +174,50 @@ CORS_ALLOW_CREDENTIALS = True
 # Firebase settings
 FIREBASE_ADMIN_SDK_PATH = config('FIREBASE_ADMIN_SDK_PATH', default=None)
 
+# firebase_uid -> user id LRU used to resolve the requesting user. Set
+# FIREBASE_UID_CACHE_SHARED to also keep entries in the default cache.
+FIREBASE_UID_CACHE_SIZE = config('FIREBASE_UID_CACHE_SIZE', default=10000, cast=int)
+FIREBASE_UID_CACHE_TTL = config('FIREBASE_UID_CACHE_TTL', default=300, cast=int)
+FIREBASE_UID_CACHE_SHARED = config('FIREBASE_UID_CACHE_SHARED', default=False, cast=bool)
+
 # Hugging Face settings
-HF_API_KEY = config('HF_API_KEY', default=None)
\ No newline at end of file
+HF_API_KEY = config('HF_API_KEY', default=None)
+
+# Matching model, shared by every request in a worker process
+MATCHING_MODEL_NAME = config('MATCHING_MODEL_NAME', default='sentence-transformers/all-MiniLM-L6-v2')
+# Load the model when the WSGI app is imported. Combined with gunicorn --preload
+# this happens once in the master so workers share the weights copy-on-write.
+MATCHING_PRELOAD_MODEL = config('MATCHING_PRELOAD_MODEL', default=False, cast=bool)
+# Entries kept in the in-process LRU in front of the TextEmbedding table
+MATCHING_TEXT_CACHE_SIZE = config('MATCHING_TEXT_CACHE_SIZE', default=10000, cast=int)
+# Compute embeddings in the background worker (manage.py run_embedding_worker),
+# which must then be running. When disabled they are computed in the web
+# process after the profile is saved. Enabling it requires a cache shared
+# between processes (see CACHES); the Docker image enables it.
+MATCHING_EMBEDDING_QUEUE = config('MATCHING_EMBEDDING_QUEUE', default=False, cast=bool)
+# Rebuild the in-memory embedding index after this many seconds even if no
+# change was signalled (0 disables); a safety net for process-local caches
+MATCHING_INDEX_MAX_AGE = config('MATCHING_INDEX_MAX_AGE', default=600, cast=int)
+# Candidate search for recommendations: 'exact', 'ivf' (pure NumPy), or
+# 'faiss' / 'hnswlib' when those packages are installed. Indexes smaller
+# than MATCHING_ANN_MIN_SIZE always use exact search.
+MATCHING_ANN_BACKEND = config('MATCHING_ANN_BACKEND', default='exact')
+MATCHING_ANN_MIN_SIZE = config('MATCHING_ANN_MIN_SIZE', default=5000, cast=int)
+MATCHING_ANN_NLIST = config('MATCHING_ANN_NLIST', default=0, cast=int)  # 0 = sqrt(population)
+MATCHING_ANN_NPROBE = config('MATCHING_ANN_NPROBE', default=8, cast=int)
+MATCHING_ANN_EF = config('MATCHING_ANN_EF', default=64, cast=int)
+# Recommendations re-rank this many embedding candidates by a weighted blend
+# of embedding similarity, availability overlap, shared event tags and
+# whether the candidate is still without a team
+MATCHING_RERANK_CANDIDATES = config('MATCHING_RERANK_CANDIDATES', default=100, cast=int)
+MATCHING_RERANK_WEIGHTS = {
+    'similarity': config('MATCHING_WEIGHT_SIMILARITY', default=0.6, cast=float),
+    'availability': config('MATCHING_WEIGHT_AVAILABILITY', default=0.25, cast=float),
+    'event_tags': config('MATCHING_WEIGHT_EVENT_TAGS', default=0.1, cast=float),
+    'team_status': config('MATCHING_WEIGHT_TEAM_STATUS', default=0.05, cast=float),
+}
+# Seconds recommendation and match query responses stay in the default cache
+# (0 disables), so they are shared between processes when it is the database
+# cache. Entries are also dropped as soon as the indexes or the
+# requester's profile change.
+MATCHING_RESULT_CACHE_TTL = config('MATCHING_RESULT_CACHE_TTL', default=120, cast=int)
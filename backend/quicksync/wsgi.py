@@ -7,4 +7,10 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'quicksync.settings')
 
-application = get_wsgi_application()
\ No newline at end of file
+application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.MATCHING_PRELOAD_MODEL:
+    from matchmaking.embeddings import warm_model
+    warm_model()
\ No newline at end of file
@@ -4,10 +4,13 @@ from .models import Team, TeamMembership, TeamInvitation
 
 @admin.register(Team)
 class TeamAdmin(admin.ModelAdmin):
-    list_display = ['name', 'creator', 'current_size', 'max_size', 'is_open', 'created_at']
+    list_display = ['name', 'creator', 'member_count', 'max_size', 'is_open', 'created_at']
     list_filter = ['is_open', 'created_at']
     search_fields = ['name', 'creator__username']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['created_at', 'updated_at', 'canonical_skills', 'member_count']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('creator')
 
 
 @admin.register(TeamMembership)
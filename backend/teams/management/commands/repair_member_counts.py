@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from teams.models import Team
+
+
+class Command(BaseCommand):
+    help = 'Recount Team.member_count from memberships, e.g. after bulk writes that skipped the signals'
+
+    def handle(self, *args, **options):
+        fixed = Team.objects.repair_member_counts()
+        self.stdout.write(self.style.SUCCESS(f'{fixed} team member counts repaired'))
@@ -0,0 +1,83 @@
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.test import APIRequestFactory
+from teams.models import Team, TeamInvitation, TeamMembership
+from teams.views import respond_to_invitation
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Accept many invitations to one team from concurrent threads against the configured database, '
+        'check the team never exceeds max_size and report accept throughput'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--invitations', type=int, default=200)
+        parser.add_argument('--max-size', type=int, default=4)
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--keep', action='store_true', help='Leave the generated users and team in place')
+
+    def handle(self, *args, **options):
+        prefix = f'stress-{uuid.uuid4().hex[:8]}'
+        creator = User.objects.create(username=f'{prefix}-creator', firebase_uid=f'{prefix}-creator')
+        team = Team.objects.create(name=prefix, creator=creator, max_size=options['max_size'])
+        TeamMembership.objects.create(user=creator, team=team, role='Team Leader', is_leader=True)
+        User.objects.bulk_create([
+            User(username=f'{prefix}-{i}', firebase_uid=f'{prefix}-{i}')
+            for i in range(options['invitations'])
+        ])
+        invitees = list(User.objects.filter(username__startswith=f'{prefix}-').exclude(pk=creator.pk))
+        TeamInvitation.objects.bulk_create([
+            TeamInvitation(team=team, inviter=creator, invitee=invitee) for invitee in invitees
+        ])
+        invitations = list(TeamInvitation.objects.filter(team=team).select_related('invitee'))
+
+        factory = APIRequestFactory()
+
+        def accept(invitation):
+            request = factory.post(
+                f'/api/teams/invitations/{invitation.pk}/respond/',
+                {'action': 'accept', 'firebase_uid': invitation.invitee.firebase_uid},
+                format='json'
+            )
+            try:
+                return respond_to_invitation(request, invitation_id=invitation.pk).status_code
+            except Exception as exc:
+                return type(exc).__name__
+            finally:
+                connection.close()
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                outcomes = Counter(pool.map(accept, invitations))
+            elapsed = time.perf_counter() - started
+
+            team.refresh_from_db()
+            members = TeamMembership.objects.filter(team=team).count()
+            self.stdout.write(
+                f'{len(invitations)} accepts on {options["threads"]} threads in {elapsed:.2f}s '
+                f'({len(invitations) / elapsed:.1f} accepts/s)'
+            )
+            self.stdout.write('outcomes: ' + ', '.join(f'{key}: {count}' for key, count in sorted(outcomes.items(), key=str)))
+            self.stdout.write(f'members: {members}  member_count: {team.member_count}  max_size: {team.max_size}')
+            if members > team.max_size or members != team.member_count:
+                raise CommandError('Team overfilled or member_count out of step')
+            # Every accept must either join or be turned away with 409; an
+            # error (e.g. a lock timeout) means the check above proved nothing
+            unexpected = set(outcomes) - {200, 409}
+            if unexpected:
+                raise CommandError(
+                    'Unexpected outcomes: ' + ', '.join(str(outcome) for outcome in sorted(unexpected, key=str))
+                )
+            self.stdout.write(self.style.SUCCESS('Team stayed within max_size'))
+        finally:
+            if not options['keep']:
+                User.objects.filter(username__startswith=f'{prefix}-').delete()
@@ -0,0 +1,24 @@
+from django.db import migrations, models
+from accounts.models import backfill_terms
+
+
+def backfill_team_skills(apps, schema_editor):
+    Team = apps.get_model('teams', 'Team')
+    backfill_terms(Team, 'canonical_skills', 'required_skills')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_canonical_terms'),
+        ('teams', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='team',
+            name='canonical_skills',
+            field=models.ManyToManyField(blank=True, related_name='teams', to='accounts.skill'),
+        ),
+        migrations.RunPython(backfill_team_skills, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:05
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_members(apps, schema_editor):
+    Team = apps.get_model('teams', 'Team')
+    TeamMembership = apps.get_model('teams', 'TeamMembership')
+    Team.objects.update(member_count=Coalesce(
+        Subquery(
+            TeamMembership.objects.filter(team=OuterRef('pk'))
+            .order_by().values('team').annotate(total=Count('id')).values('total')
+        ),
+        0
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teams', '0002_team_canonical_skills'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='team',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_members, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='team',
+            index=models.Index(fields=['is_open', 'member_count', 'max_size'], name='team_open_space_idx'),
+        ),
+    ]
@@ -1,9 +1,37 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 
+class TeamQuerySet(models.QuerySet):
+    def with_details(self):
+        """Everything TeamSerializer reads, in a fixed number of queries"""
+        return self.select_related('creator').prefetch_related(
+            Prefetch(
+                'teammembership_set',
+                queryset=TeamMembership.objects.select_related('user').order_by('joined_at', 'id')
+            )
+        )
+
+    def with_space(self):
+        return self.filter(member_count__lt=F('max_size'))
+
+    def repair_member_counts(self):
+        """Recount member_count from the memberships; returns rows fixed"""
+        actual = Coalesce(
+            Subquery(
+                TeamMembership.objects.filter(team=OuterRef('pk'))
+                .order_by().values('team').annotate(total=Count('id')).values('total')
+            ),
+            0
+        )
+        stale = list(self.annotate(actual=actual).exclude(member_count=F('actual')).values_list('pk', flat=True))
+        return self.model.objects.filter(pk__in=stale).update(member_count=actual)
+
+
 class Team(models.Model):
     """Team model for hackathon teams"""
     name = models.CharField(max_length=255)
@@ -12,17 +40,38 @@ class Team(models.Model):
     members = models.ManyToManyField(User, through='TeamMembership', related_name='teams')
     max_size = models.PositiveIntegerField(default=4)
     required_skills = models.JSONField(default=list)  # Skills needed for the team
+    canonical_skills = models.ManyToManyField('accounts.Skill', blank=True, related_name='teams')
     event_tags = models.JSONField(default=list)  # Event/hackathon tags
     is_open = models.BooleanField(default=True)  # Whether accepting new members
+    # Maintained by TeamMembership signals with F() updates; never assign it
+    member_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = TeamQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            # Covers TeamQuerySet.with_space() on open teams
+            models.Index(fields=['is_open', 'member_count', 'max_size'], name='team_open_space_idx'),
+        ]
+    
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        # A full save would write back a member_count read before concurrent
+        # joins or leaves, so existing rows save everything else
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'member_count'
+            ]
+        super().save(*args, **kwargs)
     
     @property
     def current_size(self):
-        return self.members.count()
+        return self.member_count
     
     @property
     def is_full(self):
@@ -43,6 +92,31 @@ class TeamMembership(models.Model):
     def __str__(self):
         return f"{self.user.username} in {self.team.name}"
 
+    def save(self, *args, **kwargs):
+        # The member_count update in the post_save handler commits with the row
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def join(cls, user, team_id, **fields):
+        """Add `user` to an open team if it has a free seat
+
+        The seat is claimed with one conditional UPDATE, so concurrent joins
+        never overfill a team and only hold the team row's lock until commit.
+        Returns None when the team is closed or full; raises IntegrityError
+        (with the claim rolled back) when the user is already a member.
+        """
+        with transaction.atomic():
+            claimed = Team.objects.filter(
+                pk=team_id, is_open=True, member_count__lt=F('max_size')
+            ).update(member_count=F('member_count') + 1)
+            if not claimed:
+                return None
+            membership = cls(user=user, team_id=team_id, **fields)
+            membership.seat_claimed = True
+            membership.save()
+        return membership
+
 
 class TeamInvitation(models.Model):
     """Model for team invitations"""
@@ -26,7 +26,6 @@ class TeamSerializer(serializers.ModelSerializer):
 
     def get_creator(self, obj):
         if obj.creator:
-            from accounts.serializers import UserMatchSerializer
             return UserMatchSerializer(obj.creator).data
         return None
 
@@ -76,6 +75,15 @@ class TeamCreateSerializer(serializers.ModelSerializer):
         return data
 
 
+class TeamSummarySerializer(serializers.ModelSerializer):
+    """Team identity and size only, for compact listings"""
+    current_size = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = Team
+        fields = ['id', 'name', 'current_size', 'max_size']
+
+
 class TeamInvitationSerializer(serializers.ModelSerializer):
     team = TeamSerializer(read_only=True)
     inviter = UserMatchSerializer(read_only=True)
@@ -90,6 +98,20 @@ class TeamInvitationSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'responded_at']
 
 
+class TeamInvitationSummarySerializer(serializers.ModelSerializer):
+    """Invitation with a summarized team, for ?fields=summary"""
+    team = TeamSummarySerializer(read_only=True)
+    inviter = UserMatchSerializer(read_only=True)
+    
+    class Meta:
+        model = TeamInvitation
+        fields = [
+            'id', 'team', 'inviter', 'message',
+            'status', 'created_at', 'responded_at'
+        ]
+        read_only_fields = fields
+
+
 class SendInvitationSerializer(serializers.Serializer):
     """Serializer for sending team invitations"""
     invitee_id = serializers.IntegerField()
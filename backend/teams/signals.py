@@ -0,0 +1,33 @@
+"""
+Mirror free-form team lists into the canonical Skill table, and keep
+Team.member_count in step with memberships
+"""
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from accounts.models import sync_terms
+from .models import Team, TeamMembership
+
+
+@receiver(post_save, sender=Team)
+def sync_team_terms(sender, instance, **kwargs):
+    sync_terms(instance.canonical_skills, instance.required_skills)
+
+
+def adjust_member_count(membership, delta):
+    Team.objects.filter(pk=membership.team_id).update(member_count=F('member_count') + delta)
+    # Keep a loaded team consistent for the rest of the request
+    if TeamMembership.team.is_cached(membership):
+        membership.team.refresh_from_db(fields=['member_count'])
+
+
+@receiver(post_save, sender=TeamMembership)
+def count_new_member(sender, instance, created, **kwargs):
+    # TeamMembership.join() already counted the seat it claimed
+    if created and not getattr(instance, 'seat_claimed', False):
+        adjust_member_count(instance, 1)
+
+
+@receiver(post_delete, sender=TeamMembership)
+def count_removed_member(sender, instance, **kwargs):
+    adjust_member_count(instance, -1)
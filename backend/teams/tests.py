@@ -0,0 +1,144 @@
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from accounts.resolver import uid_cache
+from .models import Team, TeamInvitation, TeamMembership
+
+User = get_user_model()
+
+# (teams, members per team): a single one-member team, then several full ones
+SIZES = [(1, 1), (3, 6)]
+
+
+class TeamQueryCountTests(TestCase):
+    """Team endpoints run a fixed number of queries, however big the teams"""
+
+    def setUp(self):
+        uid_cache.clear()
+        self.leader = User.objects.create(username='leader', firebase_uid='uid-leader')
+        self.invitee = User.objects.create(username='invitee', firebase_uid='uid-invitee')
+        self.user_count = 0
+
+    def make_teams(self, teams, members):
+        created = []
+        for _ in range(teams):
+            team = Team.objects.create(
+                name=f'Team {Team.objects.count() + 1}', creator=self.leader, max_size=members + 1
+            )
+            TeamMembership.objects.create(user=self.leader, team=team, role='Team Leader', is_leader=True)
+            for _ in range(members - 1):
+                self.user_count += 1
+                member = User.objects.create(username=f'member{self.user_count}')
+                TeamMembership.objects.create(user=member, team=team)
+            TeamInvitation.objects.create(team=team, inviter=self.leader, invitee=self.invitee)
+            created.append(team)
+        return created
+
+    def test_team_list(self):
+        for teams, members in SIZES:
+            with self.subTest(teams=teams, members=members):
+                self.make_teams(teams, members)
+                # count, teams with creators, memberships with users
+                with self.assertNumQueries(3):
+                    response = self.client.get('/api/teams/')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['count'], Team.objects.count())
+
+    def test_team_detail(self):
+        self.client.force_login(self.leader)
+        for teams, members in SIZES:
+            with self.subTest(teams=teams, members=members):
+                team = self.make_teams(teams, members)[-1]
+                # session, user, team with creator, memberships with users
+                with self.assertNumQueries(4):
+                    response = self.client.get(f'/api/teams/{team.id}/')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data['memberships']), members)
+
+    def test_my_teams(self):
+        for teams, members in SIZES:
+            with self.subTest(teams=teams, members=members):
+                self.make_teams(teams, members)
+                uid_cache.clear()
+                # user by firebase_uid, count, teams with creators, memberships with users
+                with self.assertNumQueries(4):
+                    response = self.client.get('/api/teams/my-teams/', {'firebase_uid': 'uid-leader'})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['count'], Team.objects.count())
+
+    def test_invitations(self):
+        for teams, members in SIZES:
+            with self.subTest(teams=teams, members=members):
+                self.make_teams(teams, members)
+                uid_cache.clear()
+                # user by firebase_uid, count, invitations with users, teams, memberships with users
+                with self.assertNumQueries(5):
+                    response = self.client.get('/api/teams/invitations/', {'firebase_uid': 'uid-invitee'})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['count'], TeamInvitation.objects.count())
+
+    def test_invitation_summaries(self):
+        for teams, members in SIZES:
+            with self.subTest(teams=teams, members=members):
+                self.make_teams(teams, members)
+                uid_cache.clear()
+                # user by firebase_uid, count, invitations with inviters, teams
+                with self.assertNumQueries(4):
+                    response = self.client.get(
+                        '/api/teams/invitations/', {'firebase_uid': 'uid-invitee', 'fields': 'summary'}
+                    )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['count'], TeamInvitation.objects.count())
+
+
+class RespondToInvitationTests(TestCase):
+    """Responses that lose a race (or a seat) are turned away with 409"""
+
+    def setUp(self):
+        uid_cache.clear()
+        self.leader = User.objects.create(username='leader', firebase_uid='uid-leader')
+        self.invitee = User.objects.create(username='invitee', firebase_uid='uid-invitee')
+        self.team = Team.objects.create(name='Team 1', creator=self.leader, max_size=3)
+        TeamMembership.objects.create(user=self.leader, team=self.team, role='Team Leader', is_leader=True)
+        self.invitation = TeamInvitation.objects.create(team=self.team, inviter=self.leader, invitee=self.invitee)
+
+    def respond(self, action='accept'):
+        return self.client.post(
+            f'/api/teams/invitations/{self.invitation.id}/respond/',
+            {'firebase_uid': 'uid-invitee', 'action': action},
+            content_type='application/json'
+        )
+
+    def assert_unchanged(self, status=TeamInvitation.PENDING, members=1):
+        self.invitation.refresh_from_db()
+        self.team.refresh_from_db()
+        self.assertEqual(self.invitation.status, status)
+        self.assertEqual(TeamMembership.objects.filter(team=self.team).count(), members)
+        self.assertEqual(self.team.member_count, members)
+
+    def test_accept(self):
+        response = self.respond()
+        self.assertEqual(response.status_code, 200)
+        self.assert_unchanged(status=TeamInvitation.ACCEPTED, members=2)
+
+    def test_concurrent_second_answer(self):
+        # Read while still pending, then answered by a concurrent request
+        stale = TeamInvitation.objects.get(pk=self.invitation.pk)
+        self.assertEqual(self.respond('decline').status_code, 200)
+        with mock.patch.object(TeamInvitation.objects, 'get', return_value=stale):
+            response = self.respond('accept')
+        self.assertEqual(response.status_code, 409)
+        self.assert_unchanged(status=TeamInvitation.DECLINED)
+
+    def test_full_team(self):
+        self.team.max_size = 1
+        self.team.save()
+        response = self.respond()
+        self.assertEqual(response.status_code, 409)
+        self.assert_unchanged()
+
+    def test_already_a_member(self):
+        TeamMembership.objects.create(user=self.invitee, team=self.team)
+        response = self.respond()
+        self.assertEqual(response.status_code, 409)
+        self.assert_unchanged(members=2)
@@ -1,25 +1,37 @@
+import logging
 from rest_framework import generics, permissions, status, serializers
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
+from accounts.resolver import firebase_user
 from django.utils import timezone
 from .models import Team, TeamMembership, TeamInvitation
 from .serializers import (
     TeamSerializer, TeamCreateSerializer, TeamInvitationSerializer,
-    SendInvitationSerializer
+    TeamInvitationSummarySerializer, SendInvitationSerializer
 )
 
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
+
 
 class TeamListCreateView(generics.ListCreateAPIView):
-    """List all teams or create a new team"""
+    """List all teams or create a new team
+
+    `?has_space=true` keeps only teams with a free seat.
+    """
     serializer_class = TeamSerializer
     permission_classes = []
     
     def get_queryset(self):
-        return Team.objects.filter(is_open=True).order_by('-created_at')
+        teams = Team.objects.with_details().filter(is_open=True)
+        if self.request.query_params.get('has_space', '').lower() in ('1', 'true', 'yes'):
+            teams = teams.with_space()
+        return teams.order_by('-created_at')
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -27,29 +39,24 @@ class TeamListCreateView(generics.ListCreateAPIView):
         return TeamSerializer
     
     def perform_create(self, serializer):
-        firebase_uid = self.request.data.get('firebase_uid')
-        print('Creating team for firebase_uid:', firebase_uid)
-        user = User.objects.filter(firebase_uid=firebase_uid).first() if firebase_uid else None
-        print('Team creator user:', user)
+        user = firebase_user(self.request)
         if not user:
-            print('No valid user found for team creation')
             raise serializers.ValidationError({'creator': 'Valid creator (firebase_uid) required.'})
         team = serializer.save(creator=user)
-        print('Team created:', team)
         TeamMembership.objects.create(
             user=user,
             team=team,
             role='Team Leader',
             is_leader=True
         )
-        print('TeamMembership created for user:', user)
+        logger.info('Team created', extra={'team_id': team.id, 'user_id': user.id})
 
 
 class TeamDetailView(generics.RetrieveUpdateDestroyAPIView):
     """Get, update, or delete a team"""
     serializer_class = TeamSerializer
     permission_classes = [permissions.IsAuthenticated]
-    queryset = Team.objects.all()
+    queryset = Team.objects.with_details()
     
     def get_serializer_class(self):
         if self.request.method in ['PUT', 'PATCH']:
@@ -64,71 +71,73 @@ class UserTeamsView(generics.ListAPIView):
 
     def get_queryset(self):
         firebase_uid = self.request.query_params.get('firebase_uid')
-        print('Fetching teams for firebase_uid:', firebase_uid)
         if not firebase_uid:
-            print('No firebase_uid provided')
             return Team.objects.none()
-        user = User.objects.filter(firebase_uid=firebase_uid).first()
-        print('User found for teams:', user)
+        user = firebase_user(self.request)
         if not user:
-            print('No user found for firebase_uid')
             return Team.objects.none()
-        teams = user.teams.all().order_by('-created_at')
-        print('Teams found:', list(teams))
-        return teams
+        return Team.objects.with_details().filter(members=user).order_by('-created_at')
 
 
 class TeamInvitationsView(generics.ListAPIView):
-    """List team invitations for current user (public, uses firebase_uid)"""
+    """List team invitations for current user (public, uses firebase_uid)
+
+    `?fields=summary` returns each team as id/name/size only.
+    """
     serializer_class = TeamInvitationSerializer
     permission_classes = []
 
+    def is_summary(self):
+        return self.request.query_params.get('fields') == 'summary'
+
+    def get_serializer_class(self):
+        if self.is_summary():
+            return TeamInvitationSummarySerializer
+        return TeamInvitationSerializer
+
     def get_queryset(self):
         firebase_uid = self.request.data.get('firebase_uid') or self.request.query_params.get('firebase_uid')
         if not firebase_uid:
             return TeamInvitation.objects.none()
-        user = User.objects.filter(firebase_uid=firebase_uid).first()
+        user = firebase_user(self.request)
         if not user:
             return TeamInvitation.objects.none()
-        return TeamInvitation.objects.filter(invitee=user).order_by('-created_at')
+        # Teams come in one prefetch query (plus one for their memberships
+        # and users), however many invitations there are
+        if self.is_summary():
+            teams = Team.objects.only('id', 'name', 'member_count', 'max_size')
+            invitations = TeamInvitation.objects.select_related('inviter')
+        else:
+            teams = Team.objects.with_details()
+            invitations = TeamInvitation.objects.select_related('inviter', 'invitee')
+        return invitations.filter(invitee=user).prefetch_related(
+            Prefetch('team', queryset=teams)
+        ).order_by('-created_at')
 
 
 @api_view(['POST'])
 @permission_classes([])
 def send_team_invitation(request, team_id):
     """Send a team invitation"""
-    print('Send invite request data:', request.data)
     team = get_object_or_404(Team, id=team_id)
-    print('Team found for invite:', team)
-    firebase_uid = request.data.get('firebase_uid')
-    inviter = User.objects.filter(firebase_uid=firebase_uid).first() if firebase_uid else None
-    print('Inviter user:', inviter)
+    inviter = firebase_user(request)
     if not inviter:
-        print('No valid inviter found')
         return Response({'error': 'Valid inviter (firebase_uid) required.'}, status=status.HTTP_400_BAD_REQUEST)
     if not team.members.filter(id=inviter.id).exists():
-        print('Inviter is not a member of the team')
         return Response({'error': 'You must be a team member to send invitations'}, status=status.HTTP_403_FORBIDDEN)
     if team.is_full:
-        print('Team is already full')
         return Response({'error': 'Team is already full'}, status=status.HTTP_400_BAD_REQUEST)
     serializer = SendInvitationSerializer(data=request.data)
     if serializer.is_valid():
         invitee_id = serializer.validated_data['invitee_id']
         message = serializer.validated_data.get('message', '')
-        print('Invitee id:', invitee_id)
-        print('Invite message:', message)
         try:
             invitee = User.objects.get(id=invitee_id)
-            print('Invitee user:', invitee)
         except User.DoesNotExist:
-            print('Invitee user not found')
             return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
         if team.members.filter(id=invitee_id).exists():
-            print('Invitee is already a team member')
             return Response({'error': 'User is already a team member'}, status=status.HTTP_400_BAD_REQUEST)
         if TeamInvitation.objects.filter(team=team, invitee=invitee).exists():
-            print('Invitation already sent to this user')
             return Response({'error': 'Invitation already sent to this user'}, status=status.HTTP_400_BAD_REQUEST)
         invitation = TeamInvitation.objects.create(
             team=team,
@@ -136,31 +145,24 @@ def send_team_invitation(request, team_id):
             invitee=invitee,
             message=message
         )
-        print('Invitation created:', invitation)
+        logger.info('Invitation sent', extra={
+            'invitation_id': invitation.id, 'team_id': team.id,
+            'inviter_id': inviter.id, 'invitee_id': invitee.id,
+        })
         serializer = TeamInvitationSerializer(invitation)
-        print('Serialized invitation:', serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
-    print('Invite serializer errors:', serializer.errors)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 @api_view(['POST'])
 def respond_to_invitation(request, invitation_id):
     """Accept or decline a team invitation"""
-    firebase_uid = request.data.get('firebase_uid')
-    print('Invitation response: firebase_uid:', firebase_uid)
-    user = None
-    if firebase_uid:
-        user = User.objects.filter(firebase_uid=firebase_uid).first()
-        print('Invitation response: user found:', user)
+    user = firebase_user(request)
     if not user:
-        print('Invitation response: No valid user found for firebase_uid')
         return Response({'error': 'Valid firebase_uid required.'}, status=status.HTTP_400_BAD_REQUEST)
     try:
         invitation = TeamInvitation.objects.get(id=invitation_id, invitee=user)
-        print('Invitation response: invitation found:', invitation)
     except TeamInvitation.DoesNotExist:
-        print('Invitation response: No invitation found for user:', user, 'and invitation_id:', invitation_id)
         return Response({'error': 'Invitation not found for this user.'}, status=status.HTTP_403_FORBIDDEN)
     
     if invitation.status != TeamInvitation.PENDING:
@@ -172,32 +174,50 @@ def respond_to_invitation(request, invitation_id):
     action = request.data.get('action')  # 'accept' or 'decline'
     
     if action == 'accept':
-        # Check if team is still open and not full
-        if not invitation.team.is_open or invitation.team.is_full:
-            return Response(
-                {'error': 'Team is no longer available'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Add user to team
-        TeamMembership.objects.create(
-            user=user,
-            team=invitation.team,
-            role=request.data.get('role', '')
-        )
-        
-        invitation.status = TeamInvitation.ACCEPTED
-        
+        new_status = TeamInvitation.ACCEPTED
     elif action == 'decline':
-        invitation.status = TeamInvitation.DECLINED
+        new_status = TeamInvitation.DECLINED
     else:
         return Response(
             {'error': 'Action must be "accept" or "decline"'},
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    invitation.responded_at = timezone.now()
-    invitation.save()
+    responded_at = timezone.now()
+    with transaction.atomic():
+        # Conditional updates instead of check-then-write, so concurrent
+        # responses can neither answer twice nor overfill the team
+        answered = TeamInvitation.objects.filter(
+            pk=invitation.pk, status=TeamInvitation.PENDING
+        ).update(status=new_status, responded_at=responded_at)
+        if not answered:
+            return Response(
+                {'error': 'Invitation has already been responded to'},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        if action == 'accept':
+            try:
+                membership = TeamMembership.join(
+                    user, invitation.team_id, role=request.data.get('role', '')
+                )
+            except IntegrityError:
+                transaction.set_rollback(True)
+                return Response(
+                    {'error': 'You are already a member of this team'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            if membership is None:
+                transaction.set_rollback(True)
+                return Response(
+                    {'error': 'Team is no longer available'},
+                    status=status.HTTP_409_CONFLICT
+                )
     
+    logger.info('Invitation answered', extra={
+        'invitation_id': invitation.id, 'team_id': invitation.team_id, 'status': new_status,
+    })
+    invitation.status = new_status
+    invitation.responded_at = responded_at
     serializer = TeamInvitationSerializer(invitation)
-    return Response(serializer.data)
\ No newline at end of file
+    return Response(serializer.data)
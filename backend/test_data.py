@@ -15,6 +15,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'quicksync.settings')
 django.setup()
 
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from teams.models import Team, TeamMembership, TeamInvitation
 from matchmaking.models import ProjectSuggestion
 from matchmaking.services import MatchingService
@@ -316,16 +317,28 @@ def create_project_suggestions():
     ]
     
     created_count = 0
-    for project_data in projects:
-        project, created = ProjectSuggestion.objects.get_or_create(
-            title=project_data['title'],
-            defaults=project_data
-        )
-        if created:
-            created_count += 1
-            print(f"Created project: {project.title}")
-    
-    print(f"Created {created_count} new project suggestions")
+    created_projects = []
+    with transaction.atomic():
+        for project_data in projects:
+            project, created = ProjectSuggestion.objects.get_or_create(
+                title=project_data['title'],
+                defaults=project_data
+            )
+            if created:
+                created_count += 1
+                created_projects.append(project)
+                print(f"Created project: {project.title}")
+
+        print(f"Created {created_count} new project suggestions")
+
+        # Embed the new projects in one batch, before the save signals'
+        # per-project re-embedding runs on commit
+        if created_projects:
+            try:
+                stats = MatchingService().embed_projects(created_projects)
+                print(f"Generated embeddings for {stats['embedded']} projects")
+            except Exception as e:
+                print(f"Error generating project embeddings: {e}")
 
 
 def generate_user_embeddings(users):
@@ -334,12 +347,11 @@ def generate_user_embeddings(users):
     
     matching_service = MatchingService()
     
-    for user in users:
-        try:
-            matching_service.create_user_embedding(user)
-            print(f"Generated embedding for {user.username}")
-        except Exception as e:
-            print(f"Error generating embedding for {user.username}: {e}")
+    try:
+        stats = matching_service.embed_users(users)
+        print(f"Generated embeddings for {stats['embedded']} users ({stats['skipped']} unchanged)")
+    except Exception as e:
+        print(f"Error generating embeddings: {e}")
 
 
 def create_sample_invitations(teams, users):
@@ -78,6 +78,9 @@ export const matchmakingAPI = {
   findMatches: (data) => api.post('/api/matchmaking/find/', data),
   
   getAvailabilityOverlap: (userId) => api.get(`/api/matchmaking/availability/${userId}/`),
+
+  // Overlap with many users ({ user_ids }) and/or a team ({ team_id }) in one request
+  getAvailabilityBatch: (data) => api.post('/api/matchmaking/availability/batch/', data),
   
   getProjectSuggestions: () => api.get('/api/matchmaking/projects/'),
   
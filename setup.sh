@@ -51,6 +51,7 @@ python manage.py makemigrations matchmaking
 # Apply migrations
 echo "Applying database migrations..."
 python manage.py migrate
+python manage.py createcachetable
 
 # Create superuser (optional)
 echo ""
@@ -91,6 +92,8 @@ echo ""
 echo "2. Start the development servers:"
 echo "   Backend:  cd backend && source ../quicksync_env/bin/activate && python manage.py runserver"
 echo "   Frontend: cd frontend && npm start"
+echo "   Embeddings are computed in the backend process; with MATCHING_EMBEDDING_QUEUE=True"
+echo "   also run: cd backend && python manage.py run_embedding_worker"
 echo ""
 echo "3. Visit http://localhost:3000 to see your app!"
 echo ""